@@ -15,13 +15,12 @@ Superego Test: 验证通过 Karma 权重调节实现行为矫正（无需梯度
 实验目标：展示随着时间推移，系统的错误率下降，且不需要梯度反向传播
 """
 
-import random
+import math
 import sys
 import os
 import numpy as np
-from typing import Dict, List, Tuple
-from dataclasses import dataclass
-from collections import defaultdict
+from typing import Optional, Tuple
+from collections import defaultdict, deque
 
 # 设置 UTF-8 编码（Windows 兼容）
 if sys.platform == 'win32':
@@ -30,50 +29,178 @@ if sys.platform == 'win32':
     except:
         pass
 
-# 可选的可视化支持
+# 可选的可视化支持（仅保存图片，使用非交互的 Agg 后端）
 try:
+    import matplotlib
+    matplotlib.use('Agg')
     import matplotlib.pyplot as plt
     HAS_MATPLOTLIB = True
 except ImportError:
     HAS_MATPLOTLIB = False
 
+# 导入时从已注册的样式中选出可用的学术风格，避免逐个 try 不存在的样式
+_WORKING_STYLE = None
+if HAS_MATPLOTLIB:
+    _WORKING_STYLE = next((s for s in ('seaborn-v0_8', 'seaborn') if s in plt.style.available), 'default')
+_STYLE_SET = False
 
-@dataclass
-class TrialResult:
-    """单次试验结果"""
-    iteration: int
-    answer: int
-    correct: bool
-    karma: float
-    error_rate: float
-    current_error_rate: float  # 滑动窗口平滑后的错误率
-    current_karma: float  # 当前 Karma 值
+
+def _ensure_style():
+    """设置学术风格（每个进程只应用一次）"""
+    global _STYLE_SET
+    if _STYLE_SET or _WORKING_STYLE is None:
+        return
+    plt.style.use(_WORKING_STYLE)
+    _STYLE_SET = True
+
+# 可选的 JIT 加速（Numba）
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+# Karma -> 正确概率查找表：覆盖 karma ∈ [-32, 32)，步长 0.25（tanh(4) ≈ 0.9993，两端已饱和）
+_PROB_LUT = (0.2 + 0.75 * (np.tanh((np.arange(256) / 4.0 - 32.0) / 8.0) + 1.0) / 2.0).astype(np.float32)
+
+
+# 单次试验记录（结构化数组的一行）
+_TRIAL_DTYPE = np.dtype([
+    ('iteration', 'i4'),
+    ('answer', 'i1'),
+    ('correct', '?'),
+    ('karma', 'f4'),
+    ('error_rate', 'f4'),
+    ('current_error_rate', 'f4'),  # 滑动窗口平滑后的错误率
+])
+
+
+if HAS_NUMBA:
+    @njit(cache=True, fastmath=True)
+    def _run_trials_numba(n, initial_karma, reward, penalty, a, b, window, seed, prob_lut):
+        """
+        实验主循环的 JIT 版本（与 SuperegoSystem.run_trial 逻辑一致）
+
+        滑动窗口使用环形缓冲 + 错误计数，平滑错误率为 O(1)。
+        正确概率与 id_function 一样查 prob_lut（即 _PROB_LUT），表外才用 tanh，保证两条路径结果一致。
+
+        Returns:
+            (karma_hist, correct_hist, answer_hist, error_hist, smoothed_hist)
+        """
+        np.random.seed(seed)
+        karma_hist = np.empty(n, dtype=np.float64)
+        correct_hist = np.empty(n, dtype=np.bool_)
+        answer_hist = np.empty(n, dtype=np.int64)
+        error_hist = np.empty(n, dtype=np.float64)
+        smoothed_hist = np.empty(n, dtype=np.float64)
+
+        correct_answer = a + b
+        # 错误答案池为 1-10 中排除正确答案的数
+        in_range = 1 <= correct_answer <= 10
+        num_wrong = 9 if in_range else 10
+
+        ring = np.zeros(window, dtype=np.int8)  # 1 表示错误
+        window_errors = 0
+        karma = initial_karma
+        correct_count = 0
+        total_count = 0
+
+        for i in range(n):
+            idx = int((karma + 32.0) * 4.0)
+            if 0 <= idx < 256:
+                prob_correct = prob_lut[idx]
+            else:
+                prob_correct = 0.2 + 0.75 * (math.tanh(karma / 8.0) + 1.0) / 2.0
+            if np.random.random() < prob_correct:
+                answer = correct_answer
+            else:
+                answer = 1 + int(np.random.random() * num_wrong)
+                if in_range and answer >= correct_answer:
+                    answer += 1
+            is_correct = answer == correct_answer
+
+            if is_correct:
+                karma += reward
+                correct_count += 1
+            else:
+                karma += penalty
+                if karma < -30.0:
+                    karma = -30.0
+            total_count += 1
+
+            slot = i % window
+            if i >= window:
+                window_errors -= ring[slot]
+            ring[slot] = 0 if is_correct else 1
+            window_errors += ring[slot]
+
+            karma_hist[i] = karma
+            correct_hist[i] = is_correct
+            answer_hist[i] = answer
+            error_hist[i] = 1.0 - correct_count / total_count
+            smoothed_hist[i] = window_errors / min(total_count, window)
+
+        return karma_hist, correct_hist, answer_hist, error_hist, smoothed_hist
 
 
 class SuperegoSystem:
     """超我系统：通过 Karma 权重调节本我行为"""
     
-    def __init__(self, initial_karma: float = 0.0):
+    # 固定属性集合：省去实例 __dict__，循环内的属性读写更快
+    __slots__ = (
+        'karma', 'correct_count', 'total_count', '_running_error', 'history',
+        'window_size', 'recent_results', '_window_errors',
+        'reward_correct', 'penalty_wrong', '_wrong_pool', '_last_question',
+    )
+    
+    def __init__(self, initial_karma: float = 0.0, capacity: int = 0):
         """
         初始化系统
         
         Args:
             initial_karma: 初始 Karma 值
+            capacity: 预分配的试验记录条数（run_experiment 会按需扩容）
         """
         self.karma = initial_karma
         self.correct_count = 0
         self.total_count = 0
-        self.history: List[TrialResult] = []
+        self._running_error = 1.0  # 总体错误率（增量维护）
+        
+        # 试验记录（结构化数组，按字段访问即为 SoA 视图）
+        self.history = np.zeros(capacity, dtype=_TRIAL_DTYPE)
         
         # 滑动窗口用于平滑错误率计算
         self.window_size = 50
-        self.recent_results: List[bool] = []  # 存储最近的正确/错误结果
+        self.recent_results: deque = deque(maxlen=self.window_size)  # 存储最近的正确/错误结果
+        self._window_errors = 0  # 窗口内错误次数（增量维护）
         
         # TK-APO 参数
         self.reward_correct = 2.0    # 正确时 Karma + 2（增强奖励，促进学习）
         self.penalty_wrong = -2.0    # 错误时 Karma - 2（适度惩罚）
         
-    def id_function(self, question: Tuple[int, int]) -> int:
+        # 错误答案池（按问题缓存，问题不变时无需重建）
+        self._wrong_pool = None
+        self._last_question = None
+    
+    def _reserve(self, capacity: int):
+        """确保记录数组至少能容纳 capacity 次试验（保留已有数据）"""
+        if capacity <= len(self.history):
+            return
+        history = np.zeros(capacity, dtype=_TRIAL_DTYPE)
+        history[:self.total_count] = self.history[:self.total_count]
+        self.history = history
+        
+    def _ensure_wrong_pool(self, question: Tuple[int, int]) -> np.ndarray:
+        """返回该问题的错误答案池（1-10 中排除正确答案），问题不变时复用"""
+        if question != self._last_question:
+            a, b = question
+            self._wrong_pool = np.array([i for i in range(1, 11) if i != a + b], dtype=np.int8)
+            self._last_question = question
+        return self._wrong_pool
+    
+    def id_function(self, question: Tuple[int, int], u: Optional[float] = None,
+                    wrong_idx: Optional[int] = None) -> int:
         """
         本我函数：模拟 0.5B 模型的幻觉
         
@@ -83,6 +210,8 @@ class SuperegoSystem:
         
         Args:
             question: (a, b) 加法问题
+            u: 预先抽取的 [0, 1) 均匀随机数（为 None 时现场抽取）
+            wrong_idx: 预先抽取的错误答案池下标（为 None 时现场抽取）
             
         Returns:
             答案（可能是错误的）
@@ -97,15 +226,23 @@ class SuperegoSystem:
         # 当 karma = -30 时，prob ≈ 0.25（仍有学习能力）
         # 当 karma = 0 时，prob ≈ 0.58（略高于随机）
         # 当 karma = 30 时，prob ≈ 0.90（很高）
-        normalized_karma = np.tanh(self.karma / 8.0)
-        prob_correct = 0.2 + 0.75 * (normalized_karma + 1.0) / 2.0
+        # 表内查表；超出表范围时直接用 math.tanh（标量计算，避免 numpy ufunc 开销）
+        idx = int((self.karma + 32.0) * 4.0)
+        if 0 <= idx < 256:
+            prob_correct = _PROB_LUT[idx]
+        else:
+            prob_correct = 0.2 + 0.75 * (math.tanh(self.karma / 8.0) + 1.0) / 2.0
         
-        if random.random() < prob_correct:
+        if u is None:
+            u = np.random.random()
+        if u < prob_correct:
             return correct_answer
         else:
             # 随机生成错误答案（1-10 之间的随机数，排除正确答案）
-            wrong_answers = [i for i in range(1, 11) if i != correct_answer]
-            return random.choice(wrong_answers)
+            pool = self._ensure_wrong_pool(question)
+            if wrong_idx is None:
+                wrong_idx = np.random.randint(len(pool))
+            return int(pool[wrong_idx])
     
     def truth_function(self, question: Tuple[int, int]) -> int:
         """
@@ -127,85 +264,114 @@ class SuperegoSystem:
         Args:
             is_correct: 答案是否正确
         """
+        # reward_correct / penalty_wrong 是 __slots__ 属性，每次调用各最多读一次；
+        # karma 读写多次，取到局部变量里算完再写回
+        karma = self.karma
         if is_correct:
-            self.karma += self.reward_correct
+            karma += self.reward_correct
             self.correct_count += 1
         else:
-            self.karma += self.penalty_wrong
+            karma += self.penalty_wrong
             # Karma 不能无限负，设置下界为 -30（允许系统有恢复能力）
-            self.karma = max(self.karma, -30.0)
-        
+            if karma < -30.0:
+                karma = -30.0
+        self.karma = karma
+
         self.total_count += 1
+        self._running_error = 1.0 - self.correct_count / self.total_count
         
-        # 更新滑动窗口
+        # 更新滑动窗口（deque 自动淘汰最旧结果，错误计数同步增减）
+        if len(self.recent_results) == self.window_size and not self.recent_results[0]:
+            self._window_errors -= 1
         self.recent_results.append(is_correct)
-        if len(self.recent_results) > self.window_size:
-            self.recent_results.pop(0)
+        if not is_correct:
+            self._window_errors += 1
     
     def get_error_rate(self) -> float:
         """计算当前错误率（总体）"""
-        if self.total_count == 0:
-            return 1.0
-        return 1.0 - (self.correct_count / self.total_count)
+        return self._running_error if self.total_count else 1.0
     
     def get_smoothed_error_rate(self) -> float:
         """计算滑动窗口平滑后的错误率"""
         if len(self.recent_results) == 0:
             return 1.0
-        
-        # 使用最近 window_size 个结果
-        window = self.recent_results[-self.window_size:]
-        error_count = sum(1 for result in window if not result)
-        return error_count / len(window)
+        return self._window_errors / len(self.recent_results)
     
-    def run_trial(self, iteration: int, question: Tuple[int, int] = (1, 1)) -> TrialResult:
+    def run_trial(self, iteration: int, question: Tuple[int, int] = (1, 1),
+                  u: Optional[float] = None, wrong_idx: Optional[int] = None) -> np.void:
         """
         运行一次试验
         
         Args:
             iteration: 迭代次数
             question: 问题（默认 1+1）
+            u: 预先抽取的均匀随机数（见 id_function）
+            wrong_idx: 预先抽取的错误答案池下标（见 id_function）
             
         Returns:
-            试验结果
+            试验结果（history 中对应的一行记录）
         """
         # 本我生成答案
-        answer = self.id_function(question)
+        answer = self.id_function(question, u, wrong_idx)
         
         # 环境验证答案
         correct_answer = self.truth_function(question)
         is_correct = (answer == correct_answer)
         
+        idx = self.total_count
+        if idx >= len(self.history):
+            self._reserve(max(2 * len(self.history), idx + 1))
+        
         # 更新 Karma
-        old_karma = self.karma
         self.update_karma(is_correct)
         
-        # 记录结果
-        error_rate = self.get_error_rate()
-        smoothed_error_rate = self.get_smoothed_error_rate()
-        result = TrialResult(
-            iteration=iteration,
-            answer=answer,
-            correct=is_correct,
-            karma=self.karma,
-            error_rate=error_rate,
-            current_error_rate=smoothed_error_rate,
-            current_karma=self.karma
-        )
-        self.history.append(result)
+        # 按索引写入记录数组
+        self.history[idx] = (iteration, answer, is_correct, self.karma,
+                             self.get_error_rate(), self.get_smoothed_error_rate())
         
-        return result
+        return self.history[idx]
     
-    def run_experiment(self, num_iterations: int = 100, question: Tuple[int, int] = (1, 1)) -> List[TrialResult]:
+    def _run_trials_jit(self, num_iterations: int, question: Tuple[int, int]):
+        """使用 Numba 内核跑完整个循环（仅用于全新系统），结束后再回填状态"""
+        a, b = question
+        seed = int(np.random.randint(0, 2**31 - 1))  # 受 np.random.seed 控制，便于复现
+        karmas, corrects, answers, errors, smoothed = _run_trials_numba(
+            num_iterations, float(self.karma), self.reward_correct, self.penalty_wrong,
+            a, b, self.window_size, seed, _PROB_LUT
+        )
+        
+        self._reserve(num_iterations)
+        history = self.history
+        history['iteration'][:num_iterations] = np.arange(1, num_iterations + 1)
+        history['answer'][:num_iterations] = answers
+        history['correct'][:num_iterations] = corrects
+        history['karma'][:num_iterations] = karmas
+        history['error_rate'][:num_iterations] = errors
+        history['current_error_rate'][:num_iterations] = smoothed
+        self.karma = float(karmas[-1])
+        self.correct_count = int(corrects.sum())
+        self.total_count = num_iterations
+        self._running_error = 1.0 - self.correct_count / self.total_count
+        self.recent_results = deque((bool(c) for c in corrects[-self.window_size:]), maxlen=self.window_size)
+        self._window_errors = sum(1 for c in self.recent_results if not c)
+    
+    def get_history(self) -> np.ndarray:
+        """返回已完成试验的记录（结构化数组视图，字段见 _TRIAL_DTYPE）"""
+        return self.history[:self.total_count]
+    
+    def run_experiment(self, num_iterations: int = 100, question: Tuple[int, int] = (1, 1),
+                       use_jit: bool = True, verbose: bool = True) -> np.ndarray:
         """
         运行完整实验
         
         Args:
             num_iterations: 迭代次数
             question: 问题（默认 1+1）
+            use_jit: 安装了 numba 时使用 JIT 内核（全新系统上运行）
+            verbose: 是否打印逐次迭代的进度（一次性输出）
             
         Returns:
-            所有试验结果
+            所有试验结果（结构化数组，见 get_history）
         """
         print(f"开始实验：验证 T-NSEC 超我概念")
         print(f"问题：{question[0]} + {question[1]} = ?")
@@ -216,16 +382,34 @@ class SuperegoSystem:
         print(f"惩罚（错误）：{self.penalty_wrong}")
         print("-" * 60)
         
-        for i in range(1, num_iterations + 1):
-            result = self.run_trial(i, question)
-            
-            # 每 10 次迭代打印一次进度
-            if i % 10 == 0 or i == 1:
-                status = "OK" if result.correct else "X"
-                print(f"迭代 {i:3d}: 答案={result.answer:2d}, "
-                      f"正确={status:2s}, "
-                      f"Karma={result.karma:6.2f}, "
-                      f"错误率={result.error_rate*100:5.2f}%")
+        if use_jit and HAS_NUMBA and self.total_count == 0 and num_iterations > 0:
+            self._run_trials_jit(num_iterations, question)
+        else:
+            self._reserve(self.total_count + num_iterations)
+            # 一次性批量抽取随机数，避免循环内逐次调用 RNG
+            u = np.random.random(num_iterations)
+            wrong_idx = np.random.randint(0, len(self._ensure_wrong_pool(question)), size=num_iterations)
+            run_trial = self.run_trial  # 循环内避免重复的属性查找
+            for i in range(1, num_iterations + 1):
+                run_trial(i, question, u[i-1], wrong_idx[i-1])
+        
+        history = self.get_history()
+        
+        # 每 10 次迭代一行进度（先整体取出需要打印的行，格式化后一次性输出）
+        if verbose:
+            iters = history['iteration']
+            rows = np.flatnonzero((iters % 10 == 0) | (iters == 1))
+            progress_lines = []
+            for i, answer, correct, karma, error_rate in zip(
+                    iters[rows].tolist(), history['answer'][rows].tolist(), history['correct'][rows].tolist(),
+                    history['karma'][rows].tolist(), history['error_rate'][rows].tolist()):
+                status = "OK" if correct else "X"
+                progress_lines.append(f"迭代 {i:3d}: 答案={answer:2d}, "
+                                      f"正确={status:2s}, "
+                                      f"Karma={karma:6.2f}, "
+                                      f"错误率={error_rate*100:5.2f}%")
+            if progress_lines:
+                print('\n'.join(progress_lines))
         
         print("-" * 60)
         print(f"实验完成！")
@@ -233,15 +417,15 @@ class SuperegoSystem:
         print(f"最终错误率：{self.get_error_rate()*100:.2f}%")
         print(f"总正确次数：{self.correct_count}/{self.total_count}")
         
-        return self.history
+        return history
 
 
-def create_academic_visualization(history: List[TrialResult], save_path: str):
+def create_academic_visualization(history: np.ndarray, save_path: str):
     """
     创建学术风格的可视化图表
     
     Args:
-        history: 试验历史
+        history: 试验历史（结构化数组）
         save_path: 保存路径
     """
     if not HAS_MATPLOTLIB:
@@ -250,18 +434,12 @@ def create_academic_visualization(history: List[TrialResult], save_path: str):
         return
     
     # 设置学术风格
-    try:
-        plt.style.use('seaborn-v0_8')
-    except:
-        try:
-            plt.style.use('seaborn')
-        except:
-            plt.style.use('default')
+    _ensure_style()
     
     # 提取数据
-    iterations = np.array([r.iteration for r in history])
-    smoothed_error_rates = np.array([r.current_error_rate * 100 for r in history])  # 转换为百分比
-    karmas = np.array([r.current_karma for r in history])
+    iterations = history['iteration']
+    smoothed_error_rates = history['current_error_rate'] * 100  # 转换为百分比
+    karmas = history['karma']
     
     # 创建图形
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(10, 8))
@@ -269,7 +447,8 @@ def create_academic_visualization(history: List[TrialResult], save_path: str):
                  fontsize=14, fontweight='bold', y=0.995)
     
     # 子图1：熵减曲线（错误率 vs 迭代次数）
-    ax1.plot(iterations, smoothed_error_rates, 'r-', linewidth=2.5, label='Error Rate (Smoothed)', alpha=0.8)
+    ax1.plot(iterations, smoothed_error_rates, 'r-', linewidth=2.5, label='Error Rate (Smoothed)', alpha=0.8,
+             rasterized=True)
     
     # 添加趋势线（多项式拟合）
     if len(iterations) > 3:
@@ -289,8 +468,8 @@ def create_academic_visualization(history: List[TrialResult], save_path: str):
     ax1.set_ylim([0, max(105, np.max(smoothed_error_rates) * 1.1)])
     
     # 子图2：超我形成（Karma vs 迭代次数）
-    ax2.fill_between(iterations, karmas, 0, alpha=0.6, color='blue', label='Cumulative Karma')
-    ax2.plot(iterations, karmas, 'b-', linewidth=2, alpha=0.9)
+    ax2.fill_between(iterations, karmas, 0, alpha=0.6, color='blue', label='Cumulative Karma', rasterized=True)
+    ax2.plot(iterations, karmas, 'b-', linewidth=2, alpha=0.9, rasterized=True)
     ax2.axhline(y=0, color='black', linestyle='-', linewidth=0.8, alpha=0.5)
     
     ax2.set_xlabel('Iterations', fontsize=11, fontweight='bold')
@@ -309,12 +488,12 @@ def create_academic_visualization(history: List[TrialResult], save_path: str):
     print(f"\n[成功] 学术可视化图表已保存至：{save_path}")
 
 
-def visualize_results(history: List[TrialResult], save_path: str = "superego_test_results.png"):
+def visualize_results(history: np.ndarray, save_path: str = "superego_test_results.png"):
     """
     可视化实验结果（保留旧版本以兼容）
     
     Args:
-        history: 试验历史
+        history: 试验历史（结构化数组）
         save_path: 保存路径
     """
     if not HAS_MATPLOTLIB:
@@ -322,14 +501,14 @@ def visualize_results(history: List[TrialResult], save_path: str = "superego_tes
         print("安装命令：pip install matplotlib")
         return
     
-    iterations = [r.iteration for r in history]
-    karmas = [r.karma for r in history]
-    error_rates = [r.error_rate * 100 for r in history]  # 转换为百分比
+    iterations = history['iteration']
+    karmas = history['karma']
+    error_rates = history['error_rate'] * 100  # 转换为百分比
     
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
     
     # 子图1：Karma 变化
-    ax1.plot(iterations, karmas, 'b-', linewidth=2, label='Karma 权重')
+    ax1.plot(iterations, karmas, 'b-', linewidth=2, label='Karma 权重', rasterized=True)
     ax1.axhline(y=0, color='r', linestyle='--', alpha=0.5, label='Karma = 0')
     ax1.set_xlabel('迭代次数', fontsize=12)
     ax1.set_ylabel('Karma 权重', fontsize=12)
@@ -338,8 +517,8 @@ def visualize_results(history: List[TrialResult], save_path: str = "superego_tes
     ax1.legend()
     
     # 子图2：错误率变化
-    ax2.plot(iterations, error_rates, 'r-', linewidth=2, label='错误率', alpha=0.7)
-    ax2.fill_between(iterations, error_rates, alpha=0.3, color='red')
+    ax2.plot(iterations, error_rates, 'r-', linewidth=2, label='错误率', alpha=0.7, rasterized=True)
+    ax2.fill_between(iterations, error_rates, alpha=0.3, color='red', rasterized=True)
     ax2.set_xlabel('迭代次数', fontsize=12)
     ax2.set_ylabel('错误率 (%)', fontsize=12)
     ax2.set_title('系统错误率随时间下降（行为矫正效果）', fontsize=14, fontweight='bold')
@@ -349,59 +528,56 @@ def visualize_results(history: List[TrialResult], save_path: str = "superego_tes
     
     plt.tight_layout()
     plt.savefig(save_path, dpi=300, bbox_inches='tight')
+    plt.close()  # Agg 后端不显示交互式图表
     print(f"\n图表已保存至：{save_path}")
-    
-    # 显示图表（如果可能）
-    try:
-        plt.show()
-    except:
-        print("（无法显示交互式图表，但已保存图片文件）")
 
 
-def analyze_results(history: List[TrialResult]):
+def analyze_results(history: np.ndarray):
     """
     分析实验结果
     
     Args:
-        history: 试验历史
+        history: 试验历史（结构化数组）
     """
     if len(history) == 0:
         return
     
     # 分段分析（前1/3、中1/3、后1/3）
+    # 对 (错误率, Karma, 正确) 做一次前缀和，各段的和由边界处相减得到
     n = len(history)
-    early = history[:n//3]
-    middle = history[n//3:2*n//3]
-    late = history[2*n//3:]
+    columns = np.column_stack((history['error_rate'], history['karma'], history['correct'])).astype(np.float64)
+    prefix = np.zeros((n + 1, 3))
+    np.cumsum(columns, axis=0, out=prefix[1:])
+    bounds = (0, n//3, 2*n//3, n)
     
     print("\n" + "=" * 60)
     print("实验结果分析")
     print("=" * 60)
     
-    print(f"\n【早期阶段】（前 {len(early)} 次迭代）")
-    print(f"  平均错误率：{np.mean([r.error_rate for r in early])*100:.2f}%")
-    print(f"  平均 Karma：{np.mean([r.karma for r in early]):.2f}")
-    print(f"  正确次数：{sum(1 for r in early if r.correct)}/{len(early)}")
-    
-    print(f"\n【中期阶段】（中间 {len(middle)} 次迭代）")
-    print(f"  平均错误率：{np.mean([r.error_rate for r in middle])*100:.2f}%")
-    print(f"  平均 Karma：{np.mean([r.karma for r in middle]):.2f}")
-    print(f"  正确次数：{sum(1 for r in middle if r.correct)}/{len(middle)}")
-    
-    print(f"\n【后期阶段】（后 {len(late)} 次迭代）")
-    print(f"  平均错误率：{np.mean([r.error_rate for r in late])*100:.2f}%")
-    print(f"  平均 Karma：{np.mean([r.karma for r in late]):.2f}")
-    print(f"  正确次数：{sum(1 for r in late if r.correct)}/{len(late)}")
+    segment_errors = []
+    for title, lo, hi in (("【早期阶段】（前", bounds[0], bounds[1]),
+                          ("【中期阶段】（中间", bounds[1], bounds[2]),
+                          ("【后期阶段】（后", bounds[2], bounds[3])):
+        count = hi - lo
+        error_sum, karma_sum, correct_sum = prefix[hi] - prefix[lo]
+        error_mean = error_sum / count if count else float('nan')
+        karma_mean = karma_sum / count if count else float('nan')
+        segment_errors.append(error_mean)
+        
+        print(f"\n{title} {count} 次迭代）")
+        print(f"  平均错误率：{error_mean*100:.2f}%")
+        print(f"  平均 Karma：{karma_mean:.2f}")
+        print(f"  正确次数：{int(round(correct_sum))}/{count}")
     
     # 计算改进幅度
-    early_error = np.mean([r.error_rate for r in early])
-    late_error = np.mean([r.error_rate for r in late])
+    early_error = segment_errors[0]
+    late_error = segment_errors[-1]
     improvement = (early_error - late_error) / early_error * 100 if early_error > 0 else 0
     
     print(f"\n【关键发现】")
     print(f"  错误率改进：{improvement:.2f}%")
-    print(f"  最终 Karma：{history[-1].karma:.2f}")
-    print(f"  最终错误率：{history[-1].error_rate*100:.2f}%")
+    print(f"  最终 Karma：{history['karma'][-1]:.2f}")
+    print(f"  最终错误率：{history['error_rate'][-1]*100:.2f}%")
     
     if improvement > 0:
         print(f"\n[成功] 验证成功：系统通过 Karma 权重调节实现了行为矫正！")
@@ -416,7 +592,7 @@ def main():
     system = SuperegoSystem(initial_karma=0.0)
     
     # 运行实验（100 次迭代，问题：1+1）
-    history = system.run_experiment(num_iterations=100, question=(1, 1))
+    history = system.run_experiment(num_iterations=100, question=(1, 1), verbose=False)
     
     # 分析结果
     analyze_results(history)
@@ -436,7 +612,6 @@ def main():
 
 if __name__ == "__main__":
     # 设置随机种子以便复现（可选）
-    random.seed(42)
     np.random.seed(42)
     
     main()
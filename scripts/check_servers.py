@@ -6,6 +6,7 @@ import requests
 import time
 import sys
 import platform
+from concurrent.futures import ThreadPoolExecutor
 
 # 设置Windows控制台编码
 if platform.system() == 'Windows':
@@ -16,19 +17,32 @@ if platform.system() == 'Windows':
 ports = [8080, 8081, 8082, 8083]
 names = ['0.5B', '1.5B', '3B', '14B']
 
-print("检查服务器状态...")
-print("=" * 60)
 
-all_running = True
-for name, port in zip(names, ports):
+def check(name_port):
+    """探测单个服务器，返回 (name, port, status_code)；未运行时 status_code 为 None"""
+    name, port = name_port
     try:
         response = requests.get(f'http://localhost:{port}/health', timeout=2)
-        if response.status_code == 200:
-            print(f"[OK] {name} 服务器运行中 (端口 {port})")
-        else:
-            print(f"[FAIL] {name} 服务器响应异常 (端口 {port})")
-            all_running = False
+        return name, port, response.status_code
     except:
+        return name, port, None
+
+
+print("检查服务器状态...")
+print("=" * 60)
+
+# 并发探测：总耗时取决于最慢的一个，而不是所有探测之和
+with ThreadPoolExecutor(max_workers=len(ports)) as ex:
+    results = list(ex.map(check, zip(names, ports)))
+
+all_running = True
+for name, port, status_code in results:
+    if status_code == 200:
+        print(f"[OK] {name} 服务器运行中 (端口 {port})")
+    elif status_code is not None:
+        print(f"[FAIL] {name} 服务器响应异常 (端口 {port})")
+        all_running = False
+    else:
         print(f"[FAIL] {name} 服务器未运行 (端口 {port})")
         all_running = False
 
@@ -5,10 +5,11 @@
 生成学术风格的压力测试图表
 """
 
-import csv
 import os
 import sys
 import numpy as np
+import matplotlib
+matplotlib.use('Agg')  # 仅保存图片，跳过 GUI 后端初始化
 import matplotlib.pyplot as plt
 from pathlib import Path
 
@@ -25,21 +26,21 @@ except:
 plt.rcParams['font.sans-serif'] = ['Arial', 'DejaVu Sans', 'Liberation Sans']
 plt.rcParams['axes.unicode_minus'] = False
 
+# 折线最多绘制的点数（300dpi 下更密的点在视觉上没有区别）
+MAX_PLOT_POINTS = 2000
+# 趋势线拟合最多使用的点数（低阶多项式的系数在更少样本下已稳定）
+MAX_FIT_POINTS = 1000
+
 
 def load_csv_data(csv_path: str):
-    """加载 CSV 数据"""
-    items_count = []
-    retrieval_rank = []
-    ram_usage_mb = []
-    time_elapsed = []
-    
-    with open(csv_path, 'r', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            items_count.append(int(row['Items_Count']))
-            retrieval_rank.append(int(row['Retrieval_Rank']))
-            ram_usage_mb.append(float(row['RAM_Usage_MB']))
-            time_elapsed.append(float(row['Time_Elapsed']))
+    """加载 CSV 数据（按表头列名一次性解析为 numpy 数组）"""
+    data = np.atleast_1d(np.genfromtxt(csv_path, delimiter=',', names=True,
+                                       dtype=None, encoding='utf-8'))
+    
+    items_count = data['Items_Count'].astype(np.int64)
+    retrieval_rank = data['Retrieval_Rank'].astype(np.int64)
+    ram_usage_mb = data['RAM_Usage_MB'].astype(np.float64)
+    time_elapsed = data['Time_Elapsed'].astype(np.float64)
     
     return items_count, retrieval_rank, ram_usage_mb, time_elapsed
 
@@ -49,11 +50,14 @@ def plot_stress_test(csv_path: str, output_path: str):
     # 加载数据
     items_count, retrieval_rank, ram_usage_mb, time_elapsed = load_csv_data(csv_path)
     
-    # 转换为 numpy 数组
-    items_count = np.array(items_count)
-    retrieval_rank = np.array(retrieval_rank)
-    ram_usage_mb = np.array(ram_usage_mb)
-    time_elapsed = np.array(time_elapsed)
+    # 绘图用的降采样下标（始终包含最后一个点：最大数据量处的结果最重要）
+    n = len(items_count)
+    stride = max(1, n // MAX_PLOT_POINTS)
+    plot_idx = np.unique(np.r_[np.arange(0, n, stride), n - 1])
+    x = items_count[plot_idx]
+    # 拟合用的等间隔采样下标
+    fit_idx = np.unique(np.linspace(0, len(items_count) - 1, MAX_FIT_POINTS).astype(int))
+    fit_x = items_count[fit_idx]
     
     # 创建图形（3 个子图）
     fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(10, 10))
@@ -61,8 +65,8 @@ def plot_stress_test(csv_path: str, output_path: str):
                  fontsize=14, fontweight='bold', y=0.995)
     
     # 子图1: Retrieval Rank（应该是平坦的线，值为 1）
-    ax1.plot(items_count, retrieval_rank, 'r-', linewidth=2.5, marker='o', 
-             markersize=6, label='Golden Memory Rank', alpha=0.8)
+    ax1.plot(x, retrieval_rank[plot_idx], 'r-', linewidth=2.5, marker='o', 
+             markersize=6, label='Golden Memory Rank', alpha=0.8, rasterized=True)
     ax1.axhline(y=1, color='green', linestyle='--', linewidth=1.5, 
                 alpha=0.6, label='Target Rank = 1')
     ax1.set_xlabel('Items Count', fontsize=11, fontweight='bold')
@@ -76,15 +80,15 @@ def plot_stress_test(csv_path: str, output_path: str):
     ax1.set_yticks(range(int(np.max(retrieval_rank)) + 2))
     
     # 子图2: RAM Usage（应该是线性的）
-    ax2.plot(items_count, ram_usage_mb, 'b-', linewidth=2.5, marker='s', 
-             markersize=6, label='RAM Usage', alpha=0.8)
+    ax2.plot(x, ram_usage_mb[plot_idx], 'b-', linewidth=2.5, marker='s', 
+             markersize=6, label='RAM Usage', alpha=0.8, rasterized=True)
     
     # 添加线性拟合线
     if len(items_count) > 1:
-        z = np.polyfit(items_count, ram_usage_mb, 1)
+        z = np.polyfit(fit_x, ram_usage_mb[fit_idx], 1)
         p = np.poly1d(z)
-        trendline = p(items_count)
-        ax2.plot(items_count, trendline, 'b--', linewidth=1.5, 
+        trendline = p(x)
+        ax2.plot(x, trendline, 'b--', linewidth=1.5, 
                 alpha=0.6, label=f'Linear Fit (slope={z[0]:.4f} MB/item)')
     
     ax2.set_xlabel('Items Count', fontsize=11, fontweight='bold')
@@ -95,16 +99,16 @@ def plot_stress_test(csv_path: str, output_path: str):
     ax2.legend(loc='upper left', fontsize=10)
     
     # 子图3: Time Elapsed
-    ax3.plot(items_count, time_elapsed, 'g-', linewidth=2.5, marker='^', 
-             markersize=6, label='Time Elapsed', alpha=0.8)
+    ax3.plot(x, time_elapsed[plot_idx], 'g-', linewidth=2.5, marker='^', 
+             markersize=6, label='Time Elapsed', alpha=0.8, rasterized=True)
     
     # 添加趋势线（可能是二次或线性）
     if len(items_count) > 1:
         # 尝试二次拟合
-        z2 = np.polyfit(items_count, time_elapsed, 2)
+        z2 = np.polyfit(fit_x, time_elapsed[fit_idx], 2)
         p2 = np.poly1d(z2)
-        trendline2 = p2(items_count)
-        ax3.plot(items_count, trendline2, 'g--', linewidth=1.5, 
+        trendline2 = p2(x)
+        ax3.plot(x, trendline2, 'g--', linewidth=1.5, 
                 alpha=0.6, label='Quadratic Fit')
     
     ax3.set_xlabel('Items Count', fontsize=11, fontweight='bold')
@@ -5,17 +5,43 @@
 整合TypeScript基准测试和服务器测试，生成完整的CSV、图表和报告
 """
 
+import asyncio
+import atexit
 import subprocess
 import sys
 import os
+import threading
 import json
 import time
+import aiohttp
+import numpy as np
+import pandas as pd
 import requests
-import csv
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any, Optional
+from typing import Awaitable, Callable, Dict, List, Any, Optional
 import platform
+import shutil
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import ijson
+    HAS_IJSON = True
+except ImportError:
+    HAS_IJSON = False
+
+try:
+    from aiolimiter import AsyncLimiter
+    HAS_AIOLIMITER = True
+except ImportError:
+    HAS_AIOLIMITER = False
 
 # 设置Windows控制台编码
 if platform.system() == 'Windows':
@@ -34,15 +60,65 @@ SERVERS = {
     '3B': {'port': 8082, 'model': 'Qwen2.5-3B-Instruct-Q4_K_M.gguf'},
     '14B': {'port': 8083, 'model': 'qwen2.5-14b-instruct-q4_k_m.gguf'},
 }
+# (名称, 端口, 模型) 元组，循环中直接解包，免去重复的字典查找
+SERVER_ITEMS = tuple((name, config['port'], config['model']) for name, config in SERVERS.items())
+
+# 启动时解析一次可执行文件路径，直接调用（shell=False），Windows上免去cmd.exe中转
+IS_WINDOWS = platform.system() == 'Windows'
+NPX = shutil.which('npx') or shutil.which('npx.cmd')
+PY312 = shutil.which('py') if IS_WINDOWS else shutil.which('python3.12')
+
+# 推理请求统一使用的JSON头，请求体用 _dumps 序列化（有orjson时走C实现）
+_JSON_HEADERS = {'Content-Type': 'application/json'}
+_dumps = orjson.dumps if HAS_ORJSON else (lambda obj: json.dumps(obj).encode('utf-8'))
+_loads = orjson.loads if HAS_ORJSON else json.loads
+
+# 报告中实际用到的顶层字段；除最新一份外只保留这些，避免常驻完整的逐请求明细
+NEEDED_KEYS = frozenset({
+    'timestamp', 'duration', 'bwt', 'cognitiveEntropy', 'analogyTransferRate', 'calibrationError',
+    'avgLatency', 'p50Latency', 'p95Latency', 'p99Latency',
+    'nodeCount', 'edgeCount', 'avgKarma', 'modularity', 'gpuMetrics',
+})
+
+# 健康检查复用同一个连接池（keep-alive），避免每次探测都新建 TCP 连接
+_HEALTH_SESSION = requests.Session()
+_HEALTH_SESSION.mount('http://', HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=0))
+atexit.register(_HEALTH_SESSION.close)
 
 def check_server_health(port: int, timeout: int = 5) -> bool:
     """检查服务器是否运行"""
     try:
-        response = requests.get(f'http://localhost:{port}/health', timeout=timeout)
+        response = _HEALTH_SESSION.get(f'http://localhost:{port}/health', timeout=timeout)
         return response.status_code == 200
     except:
         return False
 
+async def _probe_health(session: aiohttp.ClientSession, port: int, timeout: float = 2) -> bool:
+    """异步检查单个服务器是否运行"""
+    try:
+        async with session.get(f'http://localhost:{port}/health',
+                               timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            return response.status == 200
+    except Exception:
+        return False
+
+async def _wait_ready(session: aiohttp.ClientSession, port: int) -> None:
+    """指数退避探测直到服务器就绪（0.1s起步，每次翻倍，最长2s）"""
+    delay = 0.1
+    while not await _probe_health(session, port):
+        await asyncio.sleep(delay)
+        delay = min(2.0, delay * 2)
+    print(f"  端口 {port} 已就绪")
+
+async def _wait_for_servers(ports: List[int], timeout: float = 30) -> bool:
+    """并发等待所有服务器就绪，超时返回 False"""
+    async with aiohttp.ClientSession() as session:
+        try:
+            await asyncio.wait_for(asyncio.gather(*(_wait_ready(session, port) for port in ports)), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
 def start_servers():
     """启动所有服务器"""
     print("=" * 60)
@@ -50,12 +126,12 @@ def start_servers():
     print("=" * 60)
     
     all_running = True
-    for name, config in SERVERS.items():
-        if check_server_health(config['port']):
-            print(f"✅ {name} 服务器已运行 (端口 {config['port']})")
+    for name, port, _ in SERVER_ITEMS:
+        if check_server_health(port):
+            print(f"✅ {name} 服务器已运行 (端口 {port})")
         else:
             all_running = False
-            print(f"⚠️  {name} 服务器未运行 (端口 {config['port']})")
+            print(f"⚠️  {name} 服务器未运行 (端口 {port})")
     
     if not all_running:
         print("\n" + "=" * 60)
@@ -71,9 +147,11 @@ def start_servers():
         auto_start = os.environ.get('AUTO_START_SERVERS', 'false').lower() == 'true'
         if auto_start:
             try:
-                if platform.system() == 'Windows':
+                if not PY312:
+                    raise FileNotFoundError('未找到 py / python3.12')
+                if IS_WINDOWS:
                     proc = subprocess.Popen(
-                        ['py', '-3.12', 'scripts\\start_models.py'],
+                        [PY312, '-3.12', 'scripts\\start_models.py'],
                         cwd=project_root,
                         stdout=subprocess.PIPE,
                         stderr=subprocess.PIPE,
@@ -81,26 +159,18 @@ def start_servers():
                     )
                 else:
                     proc = subprocess.Popen(
-                        ['python3.12', 'scripts/start_models.py'],
+                        [PY312, 'scripts/start_models.py'],
                         cwd=project_root,
                         stdout=subprocess.PIPE,
                         stderr=subprocess.PIPE
                     )
                 
                 print("等待服务器启动（30秒）...")
-                for i in range(30):
-                    time.sleep(1)
-                    all_running = True
-                    for name, config in SERVERS.items():
-                        if not check_server_health(config['port'], timeout=2):
-                            all_running = False
-                            break
-                    if all_running:
-                        print(f"\n✅ 所有服务器已启动！")
-                        break
-                    print(f".", end='', flush=True)
-                
-                if not all_running:
+                ports = [port for _, port, _ in SERVER_ITEMS]
+                all_running = asyncio.run(_wait_for_servers(ports))
+                if all_running:
+                    print(f"\n✅ 所有服务器已启动！")
+                else:
                     print("\n⚠️  服务器可能未完全启动，继续测试...")
             except Exception as e:
                 print(f"❌ 启动失败: {e}")
@@ -119,31 +189,127 @@ def run_typescript_benchmark():
     print("运行TypeScript基准测试 (benchmark-full.ts)")
     print("=" * 60)
     
+    if not NPX:
+        print("❌ 未找到npx，请先安装Node.js")
+        return False
+    
     try:
         # 使用npx直接运行，避免npm路径问题
-        result = subprocess.run(
-            ['npx', 'tsx', 'scripts/benchmark-full.ts'],
+        # 逐行转发输出，不在内存中缓存整个日志
+        proc = subprocess.Popen(
+            [NPX, 'tsx', 'scripts/benchmark-full.ts'],
             cwd=project_root,
-            capture_output=True,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
             text=True,
-            timeout=3600,  # 1小时超时
-            shell=True if platform.system() == 'Windows' else False
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1,
         )
         
-        print(result.stdout)
-        if result.stderr:
-            print("错误输出:", result.stderr)
+        timeout = 3600  # 1小时超时
+        deadline = time.monotonic() + timeout
+        watchdog = threading.Timer(timeout, proc.kill)
+        watchdog.start()
+        try:
+            for line in proc.stdout:
+                sys.stdout.write(line)
+            proc.wait()
+        finally:
+            watchdog.cancel()
+            # 读取管道异常退出时不要留下孤儿进程
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+        
+        if time.monotonic() >= deadline:
+            print("❌ 基准测试超时")
+            return False
         
-        return result.returncode == 0
-    except subprocess.TimeoutExpired:
-        print("❌ 基准测试超时")
-        return False
+        return proc.returncode == 0
     except Exception as e:
         print(f"❌ 运行失败: {e}")
         return False
 
-def collect_server_test_data():
-    """收集服务器测试数据"""
+async def _probe(session: aiohttp.ClientSession, server_name: str, port: int, prompt: str) -> Dict[str, Any]:
+    """向单个服务器发送一次推理请求"""
+    try:
+        start_time = time.time()
+        async with session.post(
+            f'http://localhost:{port}/infer',
+            data=_dumps({
+                'prompt': prompt,
+                'maxTokens': 256,
+                'temperature': 0.7,
+            }),
+            headers=_JSON_HEADERS,
+            timeout=aiohttp.ClientTimeout(total=60)
+        ) as response:
+            if response.status == 200:
+                data = _loads(await response.read())
+                latency = (time.time() - start_time) * 1000
+                result = {
+                    'server': server_name,
+                    'port': port,
+                    'prompt': prompt,
+                    'success': True,
+                    'latency': latency,
+                    'tokens': data.get('tokens', 0),
+                    'tokensPerSecond': data.get('tokensPerSecond', 0),
+                    'duration': data.get('duration', latency),
+                    'gpuMemoryUsed': data.get('gpuMemoryUsed', 0),
+                    'gpuLoad': data.get('gpuLoad', 0),
+                    'timestamp_epoch': time.time(),
+                }
+                print(f"  [{server_name}] {prompt[:40]}... ✅ {latency:.0f}ms, {result['tokensPerSecond']:.1f} TPS")
+            else:
+                latency = (time.time() - start_time) * 1000
+                result = {
+                    'server': server_name,
+                    'port': port,
+                    'prompt': prompt,
+                    'success': False,
+                    'error': f'HTTP {response.status}',
+                    'latency': latency,
+                    'timestamp_epoch': time.time(),
+                }
+                print(f"  [{server_name}] {prompt[:40]}... ❌ HTTP {response.status}")
+    except Exception as e:
+        result = {
+            'server': server_name,
+            'port': port,
+            'prompt': prompt,
+            'success': False,
+            'error': str(e) or type(e).__name__,
+            'latency': 0,
+            'timestamp_epoch': time.time(),
+        }
+        print(f"  [{server_name}] {prompt[:40]}... ❌ {result['error'][:50]}")
+    return result
+
+async def _probe_server(session: aiohttp.ClientSession, server_name: str, port: int, prompts: List[str],
+                        pace: Optional[Callable[[], Awaitable[Any]]] = None) -> List[Dict[str, Any]]:
+    """
+    对单个服务器逐个发送提示：同一服务器同一时刻只有一个请求，记录的延迟不含排队等待；
+    给出 pace 时每次发送前先等待限速，延迟计时从真正发出时开始
+    """
+    results = []
+    for prompt in prompts:
+        if pace is not None:
+            await pace()
+        results.append(await _probe(session, server_name, port, prompt))
+    return results
+
+def parse_rate(value: str) -> float:
+    """解析 BENCH_RPS（请求/秒，0 表示不限速），非数字、负数或非有限值抛出 ValueError"""
+    rate = float(value)
+    if not (0 <= rate < float('inf')):
+        raise ValueError(f"must be a finite number >= 0, got {value!r}")
+    return rate
+
+async def collect_server_test_data_async(rate_per_sec: float = 0):
+    """收集服务器测试数据（各服务器之间并发，同一服务器内逐个发送）"""
     print("\n" + "=" * 60)
     print("收集服务器测试数据")
     print("=" * 60)
@@ -156,78 +322,49 @@ def collect_server_test_data():
         '解释机器学习',
     ]
     
-    results = []
-    
-    for server_name, server_config in SERVERS.items():
-        port = server_config['port']
-        
+    active_servers = []
+    for server_name, port, _ in SERVER_ITEMS:
         if not check_server_health(port):
             print(f"⚠️  {server_name} 服务器未运行，跳过")
             continue
         
-        print(f"\n测试 {server_name} 服务器 (端口 {port})...")
-        
-        for i, prompt in enumerate(test_prompts, 1):
-            print(f"  [{i}/{len(test_prompts)}] {prompt[:40]}...", end=' ', flush=True)
-            
-            try:
-                start_time = time.time()
-                response = requests.post(
-                    f'http://localhost:{port}/infer',
-                    json={
-                        'prompt': prompt,
-                        'maxTokens': 256,
-                        'temperature': 0.7,
-                    },
-                    timeout=60
-                )
-                latency = (time.time() - start_time) * 1000
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    result = {
-                        'server': server_name,
-                        'port': port,
-                        'prompt': prompt,
-                        'success': True,
-                        'latency': latency,
-                        'tokens': data.get('tokens', 0),
-                        'tokensPerSecond': data.get('tokensPerSecond', 0),
-                        'duration': data.get('duration', latency),
-                        'gpuMemoryUsed': data.get('gpuMemoryUsed', 0),
-                        'gpuLoad': data.get('gpuLoad', 0),
-                        'timestamp': datetime.now().isoformat(),
-                    }
-                    print(f"✅ {latency:.0f}ms, {result['tokensPerSecond']:.1f} TPS")
-                else:
-                    result = {
-                        'server': server_name,
-                        'port': port,
-                        'prompt': prompt,
-                        'success': False,
-                        'error': f'HTTP {response.status_code}',
-                        'latency': latency,
-                        'timestamp': datetime.now().isoformat(),
-                    }
-                    print(f"❌ HTTP {response.status_code}")
-                
-                results.append(result)
-            except Exception as e:
-                result = {
-                    'server': server_name,
-                    'port': port,
-                    'prompt': prompt,
-                    'success': False,
-                    'error': str(e),
-                    'latency': 0,
-                    'timestamp': datetime.now().isoformat(),
-                }
-                print(f"❌ {str(e)[:50]}")
-                results.append(result)
-            
-            time.sleep(0.5)
+        active_servers.append((server_name, port))
     
-    return results
+    if not active_servers:
+        return []
+    
+    print(f"\n并发测试 {len(active_servers)} 个服务器 × {len(test_prompts)} 个提示（每个服务器逐个发送）...")
+    
+    pace = None
+    if rate_per_sec > 0:
+        print(f"限速: {rate_per_sec:g} 请求/秒")
+        if HAS_AIOLIMITER:
+            # 令牌桶，所有服务器共用；容量 1、每 1/速率 秒补一个令牌
+            # （AsyncLimiter(rate, 1) 在 rate < 1 时容量不足 1，acquire() 会抛 ValueError）
+            pace = AsyncLimiter(1, 1 / rate_per_sec).acquire
+        else:
+            # 容量为 1 的令牌桶：相邻两次发送至少间隔 1/速率，响应慢时也不会补发积压的请求
+            loop = asyncio.get_running_loop()
+            interval = 1 / rate_per_sec
+            next_at = loop.time()
+            
+            async def pace():
+                nonlocal next_at
+                now = loop.time()
+                wait = next_at - now
+                next_at = max(now, next_at) + interval
+                if wait > 0:
+                    await asyncio.sleep(wait)
+    
+    # 所有请求共享一个 keep-alive 连接池，每个服务器只需一条连接；结果按服务器、提示顺序拼接
+    connector = aiohttp.TCPConnector(limit=32, limit_per_host=1, keepalive_timeout=60)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        per_server = await asyncio.gather(*(
+            _probe_server(session, server_name, port, test_prompts, pace)
+            for server_name, port in active_servers
+        ))
+    
+    return [result for results in per_server for result in results]
 
 def load_json_reports(reports_dir: Path) -> List[Dict[str, Any]]:
     """加载JSON报告文件"""
@@ -236,20 +373,43 @@ def load_json_reports(reports_dir: Path) -> List[Dict[str, Any]]:
     if not reports_dir.exists():
         return reports
     
-    for json_file in sorted(reports_dir.glob('benchmark-*.json')):
+    def load(json_file: Path, full: bool):
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                data['_source_file'] = json_file.name
-                reports.append(data)
+            if full:
+                data = _loads(json_file.read_bytes())
+            elif HAS_IJSON:
+                # 流式解析，只收集需要的顶层字段
+                with open(json_file, 'rb') as f:
+                    data = {k: v for k, v in ijson.kvitems(f, '', use_float=True) if k in NEEDED_KEYS}
+            else:
+                data = {k: v for k, v in _loads(json_file.read_bytes()).items() if k in NEEDED_KEYS}
+            data['_source_file'] = json_file.name
+            return json_file, data
         except Exception as e:
-            print(f"⚠️  无法加载 {json_file}: {e}")
+            return json_file, e
+    
+    # scandir一次枚举目录，按文件名前后缀过滤，避免glob的fnmatch开销
+    with os.scandir(reports_dir) as it:
+        entries = [e for e in it
+                   if e.name.startswith('benchmark-') and e.name.endswith('.json') and e.is_file()]
+    entries.sort(key=lambda e: e.name)
+    files = [Path(e.path) for e in entries]
+    
+    # 读取是IO密集型，用线程池重叠系统调用；最新的报告完整加载
+    full = [i == len(files) - 1 for i in range(len(files))]
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        loaded = list(executor.map(load, files, full))
+    
+    for json_file, data in loaded:
+        if isinstance(data, Exception):
+            print(f"⚠️  无法加载 {json_file}: {data}")
+        else:
+            reports.append(data)
     
     return reports
 
 def export_all_to_csv(server_results: List[Dict], json_reports: List[Dict], output_dir: Path):
-    """导出所有数据到CSV"""
-    output_dir.mkdir(parents=True, exist_ok=True)
+    """导出所有数据到CSV（output_dir 需由调用方预先创建）"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
     # 1. 服务器测试结果CSV
@@ -261,12 +421,12 @@ def export_all_to_csv(server_results: List[Dict], json_reports: List[Dict], outp
             'duration', 'gpuMemoryUsed', 'gpuLoad', 'error'
         ]
         
-        with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-            for result in server_results:
-                row = {field: result.get(field, '') for field in fieldnames}
-                writer.writerow(row)
+        df = pd.DataFrame(server_results)
+        # 采集时只记录epoch秒，导出时一次性向量化转换为本地时间ISO字符串
+        utc_offset = datetime.now().astimezone().utcoffset().total_seconds()
+        df['timestamp'] = pd.to_datetime(df['timestamp_epoch'] + utc_offset, unit='s').dt.strftime('%Y-%m-%dT%H:%M:%S.%f')
+        df = df.reindex(columns=fieldnames).convert_dtypes()
+        df.to_csv(csv_path, index=False, encoding='utf-8')
         
         print(f"✅ 服务器测试CSV: {csv_path}")
     
@@ -274,141 +434,120 @@ def export_all_to_csv(server_results: List[Dict], json_reports: List[Dict], outp
     if json_reports:
         csv_path = output_dir / f'benchmark_metrics_{timestamp}.csv'
         
-        # 提取关键指标
-        rows = []
-        for report in json_reports:
-            row = {
-                'timestamp': report.get('timestamp', ''),
-                'duration': report.get('duration', 0),
-                'bwt': report.get('bwt', 0),
-                'cognitiveEntropy': report.get('cognitiveEntropy', 0),
-                'analogyTransferRate': report.get('analogyTransferRate', 0),
-                'calibrationError': report.get('calibrationError', 0),
-                'avgLatency': report.get('avgLatency', 0),
-                'p50Latency': report.get('p50Latency', 0),
-                'p95Latency': report.get('p95Latency', 0),
-                'p99Latency': report.get('p99Latency', 0),
-                'nodeCount': report.get('nodeCount', 0),
-                'edgeCount': report.get('edgeCount', 0),
-                'avgKarma': report.get('avgKarma', 0),
-                'modularity': report.get('modularity', 0),
-            }
-            
-            # GPU指标
-            if 'gpuMetrics' in report and report['gpuMetrics']:
-                gpu = report['gpuMetrics']
-                row.update({
-                    'avgVramUsed': gpu.get('avgVramUsed', 0),
-                    'peakVramUsed': gpu.get('peakVramUsed', 0),
-                    'avgGpuLoad': gpu.get('avgGpuLoad', 0),
-                    'peakGpuLoad': gpu.get('peakGpuLoad', 0),
-                    'avgTPS': gpu.get('avgTPS', 0),
-                    'TPW': gpu.get('TPW', 0),
-                })
-            
-            rows.append(row)
+        # 提取关键指标，gpuMetrics.* 嵌套字段由json_normalize展开为列
+        metric_defaults = {
+            'timestamp': '', 'duration': 0, 'bwt': 0, 'cognitiveEntropy': 0,
+            'analogyTransferRate': 0, 'calibrationError': 0,
+            'avgLatency': 0, 'p50Latency': 0, 'p95Latency': 0, 'p99Latency': 0,
+            'nodeCount': 0, 'edgeCount': 0, 'avgKarma': 0, 'modularity': 0,
+        }
+        gpu_fields = ['avgVramUsed', 'peakVramUsed', 'avgGpuLoad', 'peakGpuLoad', 'avgTPS', 'TPW']
         
-        if rows:
-            fieldnames = list(rows[0].keys())
-            with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(rows)
-            
-            print(f"✅ 基准指标CSV: {csv_path}")
+        df = pd.json_normalize(json_reports, max_level=1)
+        columns = list(metric_defaults)
+        gpu_columns = [f'gpuMetrics.{field}' for field in gpu_fields]
+        if df.columns.str.startswith('gpuMetrics.').any():
+            columns += gpu_columns
+        df = df.reindex(columns=columns).fillna(metric_defaults)
+        # 有gpuMetrics的报告缺失字段记0，没有gpuMetrics的报告GPU列留空
+        if len(columns) > len(metric_defaults):
+            has_gpu = [bool(report.get('gpuMetrics')) for report in json_reports]
+            df.loc[has_gpu, gpu_columns] = df.loc[has_gpu, gpu_columns].fillna(0)
+        df = df.convert_dtypes()
+        df.columns = [column.removeprefix('gpuMetrics.') for column in df.columns]
+        df.to_csv(csv_path, index=False, encoding='utf-8')
+        
+        print(f"✅ 基准指标CSV: {csv_path}")
 
 def generate_comprehensive_report(server_results: List[Dict], json_reports: List[Dict], output_dir: Path):
-    """生成综合报告"""
-    output_dir.mkdir(parents=True, exist_ok=True)
+    """生成综合报告（output_dir 需由调用方预先创建）"""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     report_path = output_dir / f'comprehensive_report_{timestamp}.md'
     
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write("# T-NSEC 3.0 完整基准测试报告\n\n")
-        f.write(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    # 先在内存中拼接，最后一次性写入
+    parts = []
+    parts.append("# T-NSEC 3.0 完整基准测试报告\n\n")
+    parts.append(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    
+    # 服务器测试结果
+    if server_results:
+        parts.append("## 服务器性能测试\n\n")
+        successful = [r for r in server_results if r.get('success', False)]
         
-        # 服务器测试结果
-        if server_results:
-            f.write("## 服务器性能测试\n\n")
-            successful = [r for r in server_results if r.get('success', False)]
-            
-            f.write(f"- **总测试数**: {len(server_results)}\n")
-            f.write(f"- **成功数**: {len(successful)}\n")
-            f.write(f"- **成功率**: {len(successful)/len(server_results)*100:.1f}%\n\n")
-            
-            # 按服务器统计
-            server_stats = {}
-            for result in successful:
-                server = result['server']
-                if server not in server_stats:
-                    server_stats[server] = {'count': 0, 'latencies': [], 'tps': []}
-                stats = server_stats[server]
-                stats['count'] += 1
-                if 'latency' in result:
-                    stats['latencies'].append(result['latency'])
-                if 'tokensPerSecond' in result:
-                    stats['tps'].append(result['tokensPerSecond'])
-            
-            f.write("### 服务器性能对比\n\n")
-            f.write("| 服务器 | 测试数 | 平均延迟(ms) | 平均TPS |\n")
-            f.write("|--------|--------|--------------|---------|\n")
-            for server_name in ['0.5B', '1.5B', '3B', '14B']:
-                if server_name in server_stats:
-                    stats = server_stats[server_name]
-                    avg_latency = sum(stats['latencies']) / len(stats['latencies']) if stats['latencies'] else 0
-                    avg_tps = sum(stats['tps']) / len(stats['tps']) if stats['tps'] else 0
-                    f.write(f"| {server_name} | {stats['count']} | {avg_latency:.2f} | {avg_tps:.2f} |\n")
+        parts.append(f"- **总测试数**: {len(server_results)}\n")
+        parts.append(f"- **成功数**: {len(successful)}\n")
+        parts.append(f"- **成功率**: {len(successful)/len(server_results)*100:.1f}%\n\n")
         
-        # TypeScript基准测试结果
-        if json_reports:
-            f.write("\n## TypeScript基准测试结果\n\n")
-            
-            latest_report = json_reports[-1]  # 使用最新的报告
-            
-            f.write("### 核心指标\n\n")
-            f.write(f"- **BWT (后向迁移)**: {latest_report.get('bwt', 0):.4f}\n")
-            f.write(f"- **认知熵**: {latest_report.get('cognitiveEntropy', 0):.4f}\n")
-            f.write(f"- **类比迁移率**: {latest_report.get('analogyTransferRate', 0)*100:.2f}%\n")
-            f.write(f"- **校准误差 (ECE)**: {latest_report.get('calibrationError', 0):.4f}\n\n")
-            
-            f.write("### 性能指标\n\n")
-            f.write(f"- **平均延迟**: {latest_report.get('avgLatency', 0):.2f} ms\n")
-            f.write(f"- **P50延迟**: {latest_report.get('p50Latency', 0):.2f} ms\n")
-            f.write(f"- **P95延迟**: {latest_report.get('p95Latency', 0):.2f} ms\n")
-            f.write(f"- **P99延迟**: {latest_report.get('p99Latency', 0):.2f} ms\n\n")
-            
-            f.write("### 图谱指标\n\n")
-            f.write(f"- **节点数**: {latest_report.get('nodeCount', 0)}\n")
-            f.write(f"- **边数**: {latest_report.get('edgeCount', 0)}\n")
-            f.write(f"- **平均Karma**: {latest_report.get('avgKarma', 0):.4f}\n")
-            f.write(f"- **模块度**: {latest_report.get('modularity', 0):.4f}\n\n")
-            
-            if 'gpuMetrics' in latest_report and latest_report['gpuMetrics']:
-                gpu = latest_report['gpuMetrics']
-                f.write("### GPU指标\n\n")
-                f.write(f"- **平均VRAM**: {gpu.get('avgVramUsed', 0):.0f} MB\n")
-                f.write(f"- **峰值VRAM**: {gpu.get('peakVramUsed', 0):.0f} MB\n")
-                f.write(f"- **平均GPU负载**: {gpu.get('avgGpuLoad', 0):.1f}%\n")
-                f.write(f"- **平均TPS**: {gpu.get('avgTPS', 0):.2f} tokens/s\n")
-                f.write(f"- **能效比 (TPW)**: {gpu.get('TPW', 0):.2f} tokens/Wh\n\n")
+        parts.append("### 服务器性能对比\n\n")
+        parts.append("| 服务器 | 测试数 | 平均延迟(ms) | P95延迟(ms) | 平均TPS |\n")
+        parts.append("|--------|--------|--------------|-------------|---------|\n")
+        if successful:
+            # 按服务器统计（一次groupby完成所有聚合）
+            df = pd.DataFrame(successful)
+            agg = df.groupby('server').agg(
+                count=('latency', 'size'),
+                avg_latency=('latency', 'mean'),
+                p95_latency=('latency', lambda x: np.percentile(x, 95)),
+                avg_tps=('tokensPerSecond', 'mean'),
+            ).fillna(0)
+            order = [name for name in ['0.5B', '1.5B', '3B', '14B'] if name in agg.index]
+            for row in agg.loc[order].itertuples():
+                parts.append(f"| {row.Index} | {row.count} | {row.avg_latency:.2f} | {row.p95_latency:.2f} | {row.avg_tps:.2f} |\n")
+    
+    # TypeScript基准测试结果
+    if json_reports:
+        parts.append("\n## TypeScript基准测试结果\n\n")
+        
+        latest_report = json_reports[-1]  # 使用最新的报告
         
-        f.write("## 结论\n\n")
-        f.write("测试完成。所有数据已导出到CSV文件，可用于论文分析和进一步研究。\n")
+        parts.append("### 核心指标\n\n")
+        parts.append(f"- **BWT (后向迁移)**: {latest_report.get('bwt', 0):.4f}\n")
+        parts.append(f"- **认知熵**: {latest_report.get('cognitiveEntropy', 0):.4f}\n")
+        parts.append(f"- **类比迁移率**: {latest_report.get('analogyTransferRate', 0)*100:.2f}%\n")
+        parts.append(f"- **校准误差 (ECE)**: {latest_report.get('calibrationError', 0):.4f}\n\n")
+        
+        parts.append("### 性能指标\n\n")
+        parts.append(f"- **平均延迟**: {latest_report.get('avgLatency', 0):.2f} ms\n")
+        parts.append(f"- **P50延迟**: {latest_report.get('p50Latency', 0):.2f} ms\n")
+        parts.append(f"- **P95延迟**: {latest_report.get('p95Latency', 0):.2f} ms\n")
+        parts.append(f"- **P99延迟**: {latest_report.get('p99Latency', 0):.2f} ms\n\n")
+        
+        parts.append("### 图谱指标\n\n")
+        parts.append(f"- **节点数**: {latest_report.get('nodeCount', 0)}\n")
+        parts.append(f"- **边数**: {latest_report.get('edgeCount', 0)}\n")
+        parts.append(f"- **平均Karma**: {latest_report.get('avgKarma', 0):.4f}\n")
+        parts.append(f"- **模块度**: {latest_report.get('modularity', 0):.4f}\n\n")
+        
+        if 'gpuMetrics' in latest_report and latest_report['gpuMetrics']:
+            gpu = latest_report['gpuMetrics']
+            parts.append("### GPU指标\n\n")
+            parts.append(f"- **平均VRAM**: {gpu.get('avgVramUsed', 0):.0f} MB\n")
+            parts.append(f"- **峰值VRAM**: {gpu.get('peakVramUsed', 0):.0f} MB\n")
+            parts.append(f"- **平均GPU负载**: {gpu.get('avgGpuLoad', 0):.1f}%\n")
+            parts.append(f"- **平均TPS**: {gpu.get('avgTPS', 0):.2f} tokens/s\n")
+            parts.append(f"- **能效比 (TPW)**: {gpu.get('TPW', 0):.2f} tokens/Wh\n\n")
+    
+    parts.append("## 结论\n\n")
+    parts.append("测试完成。所有数据已导出到CSV文件，可用于论文分析和进一步研究。\n")
+    
+    with open(report_path, 'w', encoding='utf-8') as f:
+        f.write(''.join(parts))
     
     print(f"✅ 综合报告: {report_path}")
     return report_path
 
 def generate_charts(server_results: List[Dict], json_reports: List[Dict], output_dir: Path):
-    """生成图表"""
+    """生成图表（output_dir 需由调用方预先创建）"""
     try:
+        import matplotlib
+        matplotlib.use('Agg')  # 无界面后端，跳过GUI初始化
         import matplotlib.pyplot as plt
-        import numpy as np
+        from matplotlib import cbook
     except ImportError:
         print("⚠️  matplotlib未安装，跳过图表生成")
         print("   安装: pip install matplotlib numpy")
         return None
     
-    output_dir.mkdir(parents=True, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
     successful_results = [r for r in server_results if r.get('success', False)]
@@ -417,23 +556,25 @@ def generate_charts(server_results: List[Dict], json_reports: List[Dict], output
         print("⚠️  没有数据可绘制")
         return None
     
+    # 绘图前一次性用numpy算好所有统计量，绘图阶段只消费预计算结果
+    if successful_results:
+        df = pd.DataFrame(successful_results)
+        server_arr = df['server'].to_numpy()
+        lat_arr = df['latency'].to_numpy(dtype=float)
+        tps_arr = df['tokensPerSecond'].to_numpy(dtype=float)
+        servers = [s for s in ['0.5B', '1.5B', '3B', '14B'] if (server_arr == s).any()]
+        masks = [server_arr == s for s in servers]
+        latency_stats = cbook.boxplot_stats([lat_arr[mask] for mask in masks], labels=servers)
+        tps_stats = cbook.boxplot_stats([tps_arr[mask] for mask in masks], labels=servers)
+        hist_counts, hist_edges = np.histogram(lat_arr, bins=30)
+    
     fig = plt.figure(figsize=(16, 12))
     
     # 1. 服务器延迟对比
     if successful_results:
         ax1 = plt.subplot(2, 3, 1)
-        server_latencies = {}
-        for result in successful_results:
-            server = result['server']
-            if server not in server_latencies:
-                server_latencies[server] = []
-            if 'latency' in result:
-                server_latencies[server].append(result['latency'])
-        
-        if server_latencies:
-            servers = ['0.5B', '1.5B', '3B', '14B']
-            data = [server_latencies.get(s, []) for s in servers]
-            ax1.boxplot([d for d in data if d], labels=[s for s in servers if s in server_latencies])
+        if servers:
+            ax1.bxp(latency_stats)
             ax1.set_title('服务器延迟对比 (ms)')
             ax1.set_ylabel('延迟 (ms)')
         ax1.grid(True, alpha=0.3)
@@ -441,18 +582,8 @@ def generate_charts(server_results: List[Dict], json_reports: List[Dict], output
     # 2. 服务器TPS对比
     if successful_results:
         ax2 = plt.subplot(2, 3, 2)
-        server_tps = {}
-        for result in successful_results:
-            server = result['server']
-            if server not in server_tps:
-                server_tps[server] = []
-            if 'tokensPerSecond' in result:
-                server_tps[server].append(result['tokensPerSecond'])
-        
-        if server_tps:
-            servers = ['0.5B', '1.5B', '3B', '14B']
-            data = [server_tps.get(s, []) for s in servers]
-            ax2.boxplot([d for d in data if d], labels=[s for s in servers if s in server_tps])
+        if servers:
+            ax2.bxp(tps_stats)
             ax2.set_title('服务器TPS对比')
             ax2.set_ylabel('TPS (tokens/s)')
         ax2.grid(True, alpha=0.3)
@@ -460,9 +591,8 @@ def generate_charts(server_results: List[Dict], json_reports: List[Dict], output
     # 3. 延迟分布
     if successful_results:
         ax3 = plt.subplot(2, 3, 3)
-        all_latencies = [r['latency'] for r in successful_results if 'latency' in r]
-        if all_latencies:
-            ax3.hist(all_latencies, bins=30, edgecolor='black', alpha=0.7)
+        if lat_arr.size:
+            ax3.stairs(hist_counts, hist_edges, fill=True, edgecolor='black', alpha=0.7)
             ax3.set_title('延迟分布')
             ax3.set_xlabel('延迟 (ms)')
             ax3.set_ylabel('频次')
@@ -516,8 +646,10 @@ def generate_charts(server_results: List[Dict], json_reports: List[Dict], output
     
     plt.tight_layout()
     
+    # 默认150 DPI草稿图，设置 BENCH_FINAL_CHARTS=1 输出300 DPI终稿
+    dpi = 300 if os.environ.get('BENCH_FINAL_CHARTS') else 150
     chart_path = output_dir / f'benchmark_charts_{timestamp}.png'
-    plt.savefig(chart_path, dpi=300, bbox_inches='tight')
+    plt.savefig(chart_path, dpi=dpi)
     plt.close()
     
     print(f"✅ 图表: {chart_path}")
@@ -525,6 +657,12 @@ def generate_charts(server_results: List[Dict], json_reports: List[Dict], output
 
 def main():
     """主函数"""
+    try:
+        rate_per_sec = parse_rate(os.environ.get('BENCH_RPS', '0'))
+    except ValueError as e:
+        print(f"❌ BENCH_RPS 无效（应为 >= 0 的请求/秒，0 表示不限速）: {e}")
+        sys.exit(2)
+    
     print("=" * 60)
     print("T-NSEC 3.0 完整基准测试")
     print("=" * 60)
@@ -545,7 +683,7 @@ def main():
         print("\n" + "=" * 60)
         print("步骤2: 收集服务器测试数据")
         print("=" * 60)
-        server_results = collect_server_test_data()
+        server_results = asyncio.run(collect_server_test_data_async(rate_per_sec))
     else:
         print("\n⚠️  服务器未运行，跳过服务器测试")
     
@@ -6,16 +6,25 @@
 生成CSV、图表和总结报告
 """
 
+import argparse
+import atexit
 import subprocess
 import sys
 import os
 import json
 import time
+import numpy as np
+import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 import csv
+import operator
+from collections import defaultdict
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Any, Callable, Dict, List, Optional
 import platform
 
 # 获取项目根目录
@@ -55,75 +64,128 @@ TEST_PROMPTS = {
     ],
 }
 
+def new_session() -> requests.Session:
+    """keep-alive 连接池，避免每次请求都重新握手；requests.Session 不保证线程安全，每个线程各用一个"""
+    session = requests.Session()
+    session.mount('http://', HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=0))
+    return session
+
+# 主线程的健康检查和启动探测共用
+SESSION = new_session()
+atexit.register(SESSION.close)
+
 def check_server_health(port: int, timeout: int = 5) -> bool:
     """检查服务器是否运行"""
     try:
-        response = requests.get(f'http://localhost:{port}/health', timeout=timeout)
+        response = SESSION.get(f'http://localhost:{port}/health', timeout=timeout)
         return response.status_code == 200
     except:
         return False
 
+def has_infer_route(port: int, timeout: float = 2) -> bool:
+    """
+    确认端口上的服务提供基准测试实际调用的 POST /infer：
+    发送不带 prompt 的空请求，项目的推理包装器返回 400（不触发生成），没有该接口的服务返回 404
+    """
+    try:
+        response = SESSION.post(f'http://localhost:{port}/infer', json={}, timeout=timeout)
+        return response.status_code != 404
+    except:
+        return False
+
+def wait_healthy(port: int, max_wait: float = 30, proc: Optional[subprocess.Popen] = None) -> bool:
+    """
+    指数退避轮询 /health（0.25s起步，每次翻倍，最长2s），max_wait 秒内未就绪返回 False
+    给出 proc 时，启动脚本异常退出（返回码非 0）立即判定失败，不再等到超时
+    """
+    deadline = time.monotonic() + max_wait
+    delay = 0.25
+    while True:
+        if check_server_health(port, timeout=1):
+            return True
+        if proc is not None and proc.poll() not in (None, 0):
+            return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, 2.0)
+
+def launch_all_models() -> subprocess.Popen:
+    """用项目的 start_models 启动脚本拉起全部服务器（脚本不支持只启动其中一部分）"""
+    if platform.system() == 'Windows':
+        return subprocess.Popen(
+            ['scripts\\start_models.bat'],
+            cwd=project_root,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            creationflags=subprocess.CREATE_NEW_CONSOLE
+        )
+    return subprocess.Popen(
+        ['python3.12', 'scripts/start_models.py'],
+        cwd=project_root,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
 def start_servers():
-    """启动所有服务器"""
+    """
+    启动服务器并确认其 /infer 接口存在
+    - 全部未运行：用 start_models 启动全部服务器
+    - 部分未运行：不调用启动脚本（它会重新启动全部四个服务器，与已运行的端口冲突），提示手动处理
+    """
     print("=" * 60)
     print("启动多模型服务器...")
     print("=" * 60)
     
     # 检查服务器是否已运行
-    all_running = True
+    missing = []
     for name, config in SERVERS.items():
         if check_server_health(config['port']):
             print(f"✅ {name} 服务器已在运行 (端口 {config['port']})")
         else:
-            all_running = False
+            missing.append(name)
             print(f"⚠️  {name} 服务器未运行 (端口 {config['port']})")
     
-    if all_running:
-        print("\n所有服务器已运行，继续测试...\n")
-        return True
-    
-    print("\n正在启动服务器...")
-    print("请确保已运行: scripts\\start_models.bat 或 py -3.12 scripts\\start_models.py\n")
+    if missing and len(missing) < len(SERVERS):
+        print(f"\n❌ 部分服务器未运行: {', '.join(missing)}")
+        print("start_models 会重新启动全部服务器并与已运行的端口冲突，因此不自动启动。")
+        print("请手动启动上述服务器，或先停止已运行的服务器后重新运行本脚本。")
+        return False
     
-    # 尝试启动服务器
     try:
-        if platform.system() == 'Windows':
-            proc = subprocess.Popen(
-                ['scripts\\start_models.bat'],
-                cwd=project_root,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=subprocess.CREATE_NEW_CONSOLE
-            )
-        else:
-            proc = subprocess.Popen(
-                ['python3.12', 'scripts/start_models.py'],
-                cwd=project_root,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-        
-        print("等待服务器启动...")
-        time.sleep(10)
+        if missing:
+            print("\n正在启动服务器...")
+            print("请确保已运行: scripts\\start_models.bat 或 py -3.12 scripts\\start_models.py\n")
+            proc = launch_all_models()
+            print("等待服务器启动...")
+            
+            # 轮询直到服务器就绪，所有端口共用 30 秒上限
+            deadline = time.monotonic() + 30
+            for name, config in SERVERS.items():
+                if wait_healthy(config['port'], max_wait=deadline - time.monotonic(), proc=proc):
+                    print(f"✅ {name} 服务器已启动")
+                else:
+                    print(f"❌ {name} 服务器启动失败")
+                    return False
         
-        # 检查服务器是否启动成功
+        # /health 正常但没有 /infer 的服务（例如占用端口的其他程序）会让所有推理请求失败
         for name, config in SERVERS.items():
-            if check_server_health(config['port'], timeout=10):
-                print(f"✅ {name} 服务器已启动")
-            else:
-                print(f"❌ {name} 服务器启动失败")
+            if not has_infer_route(config['port']):
+                print(f"❌ {name} 服务器 (端口 {config['port']}) 没有 /infer 接口")
                 return False
         
+        print("\n所有服务器已就绪，继续测试...\n")
         return True
     except Exception as e:
         print(f"❌ 启动服务器失败: {e}")
         return False
 
-def test_inference(port: int, prompt: str, max_tokens: int = 512) -> Dict[str, Any]:
+def test_inference(port: int, prompt: str, max_tokens: int = 512, session: requests.Session = SESSION) -> Dict[str, Any]:
     """测试推理接口"""
     try:
         start_time = time.time()
-        response = requests.post(
+        response = session.post(
             f'http://localhost:{port}/infer',
             json={
                 'prompt': prompt,
@@ -159,76 +221,103 @@ def test_inference(port: int, prompt: str, max_tokens: int = 512) -> Dict[str, A
             'latency': 0,
         }
 
-def run_benchmark_tests():
-    """运行基准测试"""
-    print("=" * 60)
-    print("运行基准测试")
-    print("=" * 60)
+# 多个服务器线程并发输出，整行打印时加锁避免交错
+_print_lock = threading.Lock()
+
+def safe_print(*args, **kwargs):
+    with _print_lock:
+        print(*args, **kwargs)
+
+# CSV 列顺序；itemgetter 一次取出整行，缺失字段由 defaultdict 补空串
+CSV_FIELDNAMES = [
+    'timestamp', 'server', 'port', 'domain', 'prompt',
+    'success', 'latency', 'tokens', 'tokensPerSecond',
+    'duration', 'gpuMemoryUsed', 'gpuLoad', 'text', 'error'
+]
+_csv_row = operator.itemgetter(*CSV_FIELDNAMES)
+
+def run_one_server(server_name: str, server_config: Dict[str, Any], on_result: Callable[[Dict[str, Any]], None]) -> List[Dict[str, Any]]:
+    """顺序测试单个服务器的所有提示，每得到一条结果就交给 on_result"""
+    port = server_config['port']
+    safe_print(f"\n测试 {server_name} 服务器 (端口 {port})...")
     
-    all_results = []
+    server_results = []
+    session = new_session()
     
-    for server_name, server_config in SERVERS.items():
-        port = server_config['port']
-        print(f"\n测试 {server_name} 服务器 (端口 {port})...")
+    for domain, prompts in TEST_PROMPTS.items():
+        safe_print(f"  [{server_name}] 测试域: {domain} ({len(prompts)} 个提示)")
         
-        server_results = []
-        
-        for domain, prompts in TEST_PROMPTS.items():
-            print(f"  测试域: {domain} ({len(prompts)} 个提示)")
+        for i, prompt in enumerate(prompts, 1):
+            result = test_inference(port, prompt, session=session)
+            result['server'] = server_name
+            result['port'] = port
+            result['domain'] = domain
+            result['prompt'] = prompt
+            result['timestamp'] = datetime.now().isoformat()
             
-            for i, prompt in enumerate(prompts, 1):
-                print(f"    [{i}/{len(prompts)}] {prompt[:50]}...", end=' ', flush=True)
-                
-                result = test_inference(port, prompt)
-                result['server'] = server_name
-                result['port'] = port
-                result['domain'] = domain
-                result['prompt'] = prompt
-                result['timestamp'] = datetime.now().isoformat()
-                
-                if result['success']:
-                    print(f"✅ {result['latency']:.0f}ms, {result.get('tokensPerSecond', 0):.1f} TPS")
-                else:
-                    print(f"❌ {result.get('error', 'Unknown error')}")
-                
-                server_results.append(result)
-                all_results.append(result)
-                
-                time.sleep(0.5)  # 避免过载
-        
-        print(f"\n  {server_name} 测试完成: {len([r for r in server_results if r['success']])}/{len(server_results)} 成功")
+            if result['success']:
+                safe_print(f"    [{server_name}] [{i}/{len(prompts)}] {prompt[:50]}... ✅ {result['latency']:.0f}ms, {result.get('tokensPerSecond', 0):.1f} TPS")
+            else:
+                safe_print(f"    [{server_name}] [{i}/{len(prompts)}] {prompt[:50]}... ❌ {result.get('error', 'Unknown error')}")
+            
+            on_result(result)
+            server_results.append(result)
+            
+            time.sleep(0.05)  # 避免过载
     
-    return all_results
+    session.close()
+    return server_results
 
-def export_to_csv(results: List[Dict[str, Any]], output_dir: Path):
-    """导出结果到CSV"""
-    output_dir.mkdir(parents=True, exist_ok=True)
+def run_benchmark_tests(output_dir: Path, concurrent: bool = False):
+    """
+    运行基准测试：默认逐个服务器顺序测试，同一时刻只有一个模型在推理，延迟/TPS 不含相互争用；
+    concurrent=True 时每个服务器一个线程同时测试，总耗时更短，但各模型的数据包含 GPU/CPU 争用
+    每条结果一产生就追加写入 CSV 并 flush，中途崩溃也不丢已完成的数据，可 tail -f 实时查看；
+    CSV 中的行按完成顺序排列。返回 (按 SERVERS 顺序排列的结果, CSV 路径)
+    """
+    print("=" * 60)
+    print("运行基准测试")
+    print("=" * 60)
     
     csv_path = output_dir / f'benchmark_results_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    
-    if not results:
-        print("⚠️  没有数据可导出")
-        return None
-    
-    # 获取所有字段
-    fieldnames = [
-        'timestamp', 'server', 'port', 'domain', 'prompt',
-        'success', 'latency', 'tokens', 'tokensPerSecond',
-        'duration', 'gpuMemoryUsed', 'gpuLoad', 'text', 'error'
-    ]
+    results_by_server = {}
     
     with open(csv_path, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=fieldnames)
-        writer.writeheader()
+        writer = csv.writer(f)
+        writer.writerow(CSV_FIELDNAMES)
+        write_lock = threading.Lock()
+        
+        def write_row(result: Dict[str, Any]):
+            with write_lock:
+                writer.writerow(_csv_row(defaultdict(str, result)))
+                f.flush()
+        
+        def finish(server_name: str, server_results: List[Dict[str, Any]]):
+            results_by_server[server_name] = server_results
+            safe_print(f"\n  {server_name} 测试完成: {len([r for r in server_results if r['success']])}/{len(server_results)} 成功")
         
-        for result in results:
-            row = {field: result.get(field, '') for field in fieldnames}
-            writer.writerow(row)
+        if concurrent:
+            with ThreadPoolExecutor(max_workers=len(SERVERS)) as executor:
+                futures = {
+                    executor.submit(run_one_server, server_name, server_config, write_row): server_name
+                    for server_name, server_config in SERVERS.items()
+                }
+                for future in as_completed(futures):
+                    finish(futures[future], future.result())
+        else:
+            for server_name, server_config in SERVERS.items():
+                finish(server_name, run_one_server(server_name, server_config, write_row))
+    
+    print(f"✅ CSV已写入: {csv_path}")
     
-    print(f"✅ CSV已导出: {csv_path}")
-    return csv_path
+    # 按 SERVERS 的顺序拼接，保证报告和图表的顺序稳定
+    all_results = []
+    for server_name in SERVERS:
+        all_results.extend(results_by_server[server_name])
+    
+    return all_results, csv_path
 
-def generate_summary_report(results: List[Dict[str, Any]], output_dir: Path):
+def generate_summary_report(results: List[Dict[str, Any]], output_dir: Path, concurrent: bool = False):
     """生成总结报告"""
     output_dir.mkdir(parents=True, exist_ok=True)
     
@@ -236,94 +325,67 @@ def generate_summary_report(results: List[Dict[str, Any]], output_dir: Path):
     
     successful_results = [r for r in results if r.get('success', False)]
     
-    # 按服务器统计
-    server_stats = {}
-    for result in successful_results:
-        server = result['server']
-        if server not in server_stats:
-            server_stats[server] = {
-                'count': 0,
-                'latencies': [],
-                'tps': [],
-                'tokens': [],
-                'gpu_memory': [],
-                'gpu_load': [],
-            }
-        
-        stats = server_stats[server]
-        stats['count'] += 1
-        if 'latency' in result:
-            stats['latencies'].append(result['latency'])
-        if 'tokensPerSecond' in result:
-            stats['tps'].append(result['tokensPerSecond'])
-        if 'tokens' in result:
-            stats['tokens'].append(result['tokens'])
-        if 'gpuMemoryUsed' in result:
-            stats['gpu_memory'].append(result['gpuMemoryUsed'])
-        if 'gpuLoad' in result:
-            stats['gpu_load'].append(result['gpuLoad'])
+    # 成功结果转成一张表，按服务器/域的统计都用 groupby 向量化计算；缺失字段为 NaN，均值时跳过
+    metrics = ['latency', 'tokensPerSecond', 'tokens', 'gpuMemoryUsed', 'gpuLoad']
+    df = pd.DataFrame(successful_results, columns=['server', 'domain', *metrics])
+    df['domain'] = df['domain'].fillna('unknown')
+    df[metrics] = df[metrics].astype('float64')
+    
+    server_stats = df.groupby('server')[metrics].agg('mean').fillna(0)
+    server_stats.insert(0, 'count', df['server'].value_counts())
+    server_stats = server_stats.reindex([name for name in SERVERS if name in server_stats.index])
+    # sort=False 保持各域首次出现的顺序
+    domain_stats = df.groupby('domain', sort=False)['latency'].agg(['size', 'mean']).fillna(0)
     
     # 生成报告
-    with open(report_path, 'w', encoding='utf-8') as f:
-        f.write("# T-NSEC 3.0 基准测试报告\n\n")
-        f.write(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        
-        f.write("## 测试概览\n\n")
-        f.write(f"- **总测试数**: {len(results)}\n")
-        f.write(f"- **成功数**: {len(successful_results)}\n")
-        f.write(f"- **成功率**: {len(successful_results)/len(results)*100:.1f}%\n\n")
-        
-        f.write("## 服务器性能统计\n\n")
-        f.write("| 服务器 | 测试数 | 平均延迟(ms) | 平均TPS | 平均Token数 | 平均VRAM(MB) | 平均GPU负载(%) |\n")
-        f.write("|--------|--------|--------------|---------|------------|--------------|---------------|\n")
-        
-        for server_name in ['0.5B', '1.5B', '3B', '14B']:
-            if server_name in server_stats:
-                stats = server_stats[server_name]
-                avg_latency = sum(stats['latencies']) / len(stats['latencies']) if stats['latencies'] else 0
-                avg_tps = sum(stats['tps']) / len(stats['tps']) if stats['tps'] else 0
-                avg_tokens = sum(stats['tokens']) / len(stats['tokens']) if stats['tokens'] else 0
-                avg_vram = sum(stats['gpu_memory']) / len(stats['gpu_memory']) if stats['gpu_memory'] else 0
-                avg_gpu_load = sum(stats['gpu_load']) / len(stats['gpu_load']) if stats['gpu_load'] else 0
-                
-                f.write(f"| {server_name} | {stats['count']} | {avg_latency:.2f} | {avg_tps:.2f} | {avg_tokens:.0f} | {avg_vram:.0f} | {avg_gpu_load:.1f} |\n")
-        
-        f.write("\n## 按域统计\n\n")
-        
-        # 按域统计
-        domain_stats = {}
-        for result in successful_results:
-            domain = result.get('domain', 'unknown')
-            if domain not in domain_stats:
-                domain_stats[domain] = {'count': 0, 'latencies': []}
-            domain_stats[domain]['count'] += 1
-            if 'latency' in result:
-                domain_stats[domain]['latencies'].append(result['latency'])
-        
-        f.write("| 域 | 测试数 | 平均延迟(ms) |\n")
-        f.write("|----|--------|--------------|\n")
-        for domain, stats in domain_stats.items():
-            avg_latency = sum(stats['latencies']) / len(stats['latencies']) if stats['latencies'] else 0
-            f.write(f"| {domain} | {stats['count']} | {avg_latency:.2f} |\n")
-        
-        f.write("\n## 关键指标\n\n")
+    lines: List[str] = []
+    lines.append("# T-NSEC 3.0 基准测试报告\n\n")
+    lines.append(f"**生成时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+    
+    lines.append("## 测试概览\n\n")
+    lines.append(f"- **总测试数**: {len(results)}\n")
+    lines.append(f"- **成功数**: {len(successful_results)}\n")
+    lines.append(f"- **成功率**: {len(successful_results)/len(results)*100:.1f}%\n")
+    if concurrent:
+        lines.append(f"- **测试模式**: 并发（{len(SERVERS)} 个模型同时推理，延迟与TPS包含相互之间的 GPU/CPU 争用）\n\n")
+    else:
+        lines.append("- **测试模式**: 顺序（同一时刻只有一个模型在推理）\n\n")
+    
+    lines.append("## 服务器性能统计\n\n")
+    lines.append("| 服务器 | 测试数 | 平均延迟(ms) | 平均TPS | 平均Token数 | 平均VRAM(MB) | 平均GPU负载(%) |\n")
+    lines.append("|--------|--------|--------------|---------|------------|--------------|---------------|\n")
+    
+    # 按服务器统计
+    for row in server_stats.itertuples():
+        lines.append(f"| {row.Index} | {row.count} | {row.latency:.2f} | {row.tokensPerSecond:.2f} | {row.tokens:.0f} | {row.gpuMemoryUsed:.0f} | {row.gpuLoad:.1f} |\n")
+    
+    lines.append("\n## 按域统计\n\n")
+    
+    # 按域统计
+    lines.append("| 域 | 测试数 | 平均延迟(ms) |\n")
+    lines.append("|----|--------|--------------|\n")
+    for domain, count, avg_latency in domain_stats.itertuples():
+        lines.append(f"| {domain} | {count} | {avg_latency:.2f} |\n")
+    
+    lines.append("\n## 关键指标\n\n")
+    
+    if successful_results:
+        all_latencies = df['latency'].dropna().to_numpy()
+        all_tps = df['tokensPerSecond'].dropna().to_numpy()
         
-        if successful_results:
-            all_latencies = [r['latency'] for r in successful_results if 'latency' in r]
-            all_tps = [r['tokensPerSecond'] for r in successful_results if 'tokensPerSecond' in r]
-            
-            if all_latencies:
-                f.write(f"- **平均延迟**: {sum(all_latencies)/len(all_latencies):.2f} ms\n")
-                f.write(f"- **最小延迟**: {min(all_latencies):.2f} ms\n")
-                f.write(f"- **最大延迟**: {max(all_latencies):.2f} ms\n")
-            
-            if all_tps:
-                f.write(f"- **平均TPS**: {sum(all_tps)/len(all_tps):.2f} tokens/s\n")
-                f.write(f"- **最小TPS**: {min(all_tps):.2f} tokens/s\n")
-                f.write(f"- **最大TPS**: {max(all_tps):.2f} tokens/s\n")
+        if all_latencies.size:
+            lines.append(f"- **平均延迟**: {all_latencies.mean():.2f} ms\n")
+            lines.append(f"- **最小延迟**: {all_latencies.min():.2f} ms\n")
+            lines.append(f"- **最大延迟**: {all_latencies.max():.2f} ms\n")
         
-        f.write("\n## 结论\n\n")
-        f.write("测试完成。所有数据已导出到CSV文件，可用于进一步分析。\n")
+        if all_tps.size:
+            lines.append(f"- **平均TPS**: {all_tps.mean():.2f} tokens/s\n")
+            lines.append(f"- **最小TPS**: {all_tps.min():.2f} tokens/s\n")
+            lines.append(f"- **最大TPS**: {all_tps.max():.2f} tokens/s\n")
+    
+    lines.append("\n## 结论\n\n")
+    lines.append("测试完成。所有数据已导出到CSV文件，可用于进一步分析。\n")
+    report_path.write_text(''.join(lines), encoding='utf-8')
     
     print(f"✅ 报告已生成: {report_path}")
     return report_path
@@ -332,7 +394,7 @@ def generate_charts(results: List[Dict[str, Any]], output_dir: Path):
     """生成图表（如果matplotlib可用）"""
     try:
         import matplotlib.pyplot as plt
-        import numpy as np
+        from matplotlib import cbook
     except ImportError:
         print("⚠️  matplotlib未安装，跳过图表生成")
         print("   安装命令: pip install matplotlib numpy")
@@ -346,47 +408,41 @@ def generate_charts(results: List[Dict[str, Any]], output_dir: Path):
         print("⚠️  没有成功的数据可绘制")
         return None
     
+    # 一次性转成结构化数组，各图按列切片/按服务器掩码取数据
+    arr = np.array(
+        [(r['server'], r.get('latency', np.nan), r.get('tokensPerSecond', np.nan)) for r in successful_results],
+        dtype=[('server', 'U8'), ('latency', 'f4'), ('tps', 'f4')],
+    )
+    servers = [s for s in ['0.5B', '1.5B', '3B', '14B'] if (arr['server'] == s).any()]
+    masks = [arr['server'] == s for s in servers]
+    
+    def box_stats(column: str):
+        data = [arr[column][mask] for mask in masks]
+        return cbook.boxplot_stats([d[~np.isnan(d)] for d in data], labels=servers)
+    
     # 1. 延迟对比图
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
     
     # 延迟箱线图
     ax1 = axes[0, 0]
-    server_latencies = {}
-    for result in successful_results:
-        server = result['server']
-        if server not in server_latencies:
-            server_latencies[server] = []
-        if 'latency' in result:
-            server_latencies[server].append(result['latency'])
-    
-    if server_latencies:
-        ax1.boxplot([server_latencies[s] for s in ['0.5B', '1.5B', '3B', '14B'] if s in server_latencies],
-                   labels=[s for s in ['0.5B', '1.5B', '3B', '14B'] if s in server_latencies])
+    if servers:
+        ax1.bxp(box_stats('latency'))
         ax1.set_title('延迟对比 (ms)')
         ax1.set_ylabel('延迟 (ms)')
         ax1.grid(True, alpha=0.3)
     
     # TPS对比图
     ax2 = axes[0, 1]
-    server_tps = {}
-    for result in successful_results:
-        server = result['server']
-        if server not in server_tps:
-            server_tps[server] = []
-        if 'tokensPerSecond' in result:
-            server_tps[server].append(result['tokensPerSecond'])
-    
-    if server_tps:
-        ax2.boxplot([server_tps[s] for s in ['0.5B', '1.5B', '3B', '14B'] if s in server_tps],
-                   labels=[s for s in ['0.5B', '1.5B', '3B', '14B'] if s in server_tps])
+    if servers:
+        ax2.bxp(box_stats('tps'))
         ax2.set_title('TPS对比 (tokens/s)')
         ax2.set_ylabel('TPS (tokens/s)')
         ax2.grid(True, alpha=0.3)
     
     # 延迟分布直方图
     ax3 = axes[1, 0]
-    all_latencies = [r['latency'] for r in successful_results if 'latency' in r]
-    if all_latencies:
+    all_latencies = arr['latency'][~np.isnan(arr['latency'])]
+    if all_latencies.size:
         ax3.hist(all_latencies, bins=30, edgecolor='black', alpha=0.7)
         ax3.set_title('延迟分布')
         ax3.set_xlabel('延迟 (ms)')
@@ -395,8 +451,8 @@ def generate_charts(results: List[Dict[str, Any]], output_dir: Path):
     
     # TPS分布直方图
     ax4 = axes[1, 1]
-    all_tps = [r['tokensPerSecond'] for r in successful_results if 'tokensPerSecond' in r]
-    if all_tps:
+    all_tps = arr['tps'][~np.isnan(arr['tps'])]
+    if all_tps.size:
         ax4.hist(all_tps, bins=30, edgecolor='black', alpha=0.7)
         ax4.set_title('TPS分布')
         ax4.set_xlabel('TPS (tokens/s)')
@@ -414,6 +470,11 @@ def generate_charts(results: List[Dict[str, Any]], output_dir: Path):
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='T-NSEC 3.0 论文基准测试')
+    parser.add_argument('--concurrent', action='store_true',
+                        help='所有服务器同时测试（更快，但延迟/TPS 含模型间资源争用，不用于论文数据）')
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("T-NSEC 3.0 论文基准测试")
     print("=" * 60)
@@ -424,37 +485,29 @@ def main():
         print("❌ 服务器启动失败，退出")
         sys.exit(1)
     
-    # 等待服务器完全启动
-    print("等待服务器完全启动...")
-    time.sleep(5)
+    # 2. 创建输出目录
+    output_dir = project_root / 'reports' / 'paper_benchmark'
+    output_dir.mkdir(parents=True, exist_ok=True)
     
-    # 2. 运行测试
-    results = run_benchmark_tests()
+    # 3. 运行测试（结果边测边写入CSV）
+    results, csv_path = run_benchmark_tests(output_dir, concurrent=args.concurrent)
     
     if not results:
         print("❌ 没有测试结果")
         sys.exit(1)
     
-    # 3. 创建输出目录
-    output_dir = project_root / 'reports' / 'paper_benchmark'
-    output_dir.mkdir(parents=True, exist_ok=True)
-    
-    # 4. 导出CSV
-    csv_path = export_to_csv(results, output_dir)
-    
-    # 5. 生成报告
-    report_path = generate_summary_report(results, output_dir)
+    # 4. 生成报告
+    report_path = generate_summary_report(results, output_dir, concurrent=args.concurrent)
     
-    # 6. 生成图表
+    # 5. 生成图表
     chart_path = generate_charts(results, output_dir)
     
-    # 7. 总结
+    # 6. 总结
     print("\n" + "=" * 60)
     print("测试完成！")
     print("=" * 60)
     print(f"\n输出文件:")
-    if csv_path:
-        print(f"  - CSV: {csv_path}")
+    print(f"  - CSV: {csv_path}")
     if report_path:
         print(f"  - 报告: {report_path}")
     if chart_path:
@@ -10,10 +10,16 @@ test_spectral_alignment.py
 依赖：
 - Python 3.12.7
 - numpy, requests, matplotlib（可选，但推荐）
-
-默认使用 Ollama embeddings API：
-- http://localhost:11434/api/embeddings
+- pyfftw（可选）：--w-glob 扫描时批量 rfft 用 FFTW_MEASURE 计划复用，wisdom 保存在 <out-dir>/.fftw_wisdom
+- scipy（可选）：批量 rfft 用 scipy.fft 多线程计算，缺失时回退 numpy.fft
+- numba（可选）：频域度量用 JIT 融合循环多线程计算，缺失时回退 numpy
+- httpx（可选）：draft/teacher 两个模型的 embedding 并发请求，缺失时顺序请求
+
+默认使用 Ollama embed API（批量，一个模型一次请求）：
+- http://localhost:11434/api/embed
+旧版 Ollama 没有该端点时，自动退回逐条 /api/embeddings（有 httpx 时最多 4 个并发，否则顺序请求）。
 你需要本机已安装并启动 Ollama，并且存在可用模型（可通过 `ollama list` 查看）。
+embedding 会缓存到 <out-dir>/.emb_cache/，重复运行时不再请求 Ollama（`--no-cache` 可跳过缓存）。
 
 注意：
 - 本脚本不会宣称“Spectral Loss 有效”，它只提供频域度量的“baseline测量”。
@@ -23,15 +29,54 @@ test_spectral_alignment.py
 from __future__ import annotations
 
 import argparse
+import asyncio
+import atexit
+import glob
+import hashlib
 import json
-import math
 import os
+import pickle
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
 import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+try:
+    from numba import njit, prange
+
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+try:
+    import pyfftw
+
+    HAS_PYFFTW = True
+except ImportError:
+    HAS_PYFFTW = False
+
+try:
+    import scipy.fft as sfft
+
+    HAS_SCIPY_FFT = True
+except ImportError:
+    HAS_SCIPY_FFT = False
+
+
+# 复用同一个 keep-alive 连接池访问 Ollama
+SESSION = requests.Session()
+SESSION.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=0))
+atexit.register(SESSION.close)
 
 
 DEFAULT_TEXTS: List[str] = [
@@ -56,77 +101,276 @@ class SampleResult:
     spec_cosine: float
 
 
-def l2_normalize(x: np.ndarray) -> np.ndarray:
-    n = np.linalg.norm(x)
-    if n == 0:
-        return x
-    return x / n
+def l2_normalize_(x: np.ndarray) -> np.ndarray:
+    # 按行原地归一化 (N, D) 数组，不额外分配结果数组；零向量保持为零
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    np.divide(x, np.maximum(norms, 1e-12), out=x)
+    return x
+
+
+def fft_length(dim: int, pow2: bool = False) -> int:
+    # 整个运行只用一个 FFT 长度：默认等于 teacher 维度；pow2=True 时补零到不小于 dim 的 2 的幂
+    return 1 << (dim - 1).bit_length() if pow2 else dim
+
+
+# (N, n) -> pyfftw.FFTW；同一次运行里 teacher 与每个 W 的 mapped 形状相同，只需 MEASURE 一次
+_FFTW_PLANS: Dict[Tuple[int, int], Any] = {}
+# 只有计划会被多次复用（扫描多个 W）时才值得付出 MEASURE 的规划开销，由 enable_fftw 打开
+_FFTW_ENABLED = False
+
+
+def enable_fftw(wisdom_path: Path) -> None:
+    """启用 pyfftw 路径，并导入上次运行保存的 wisdom（命中时 MEASURE 规划几乎不耗时）"""
+    global _FFTW_ENABLED
+    _FFTW_ENABLED = True
+    if wisdom_path.exists():
+        try:
+            with open(wisdom_path, "rb") as f:
+                pyfftw.import_wisdom(pickle.load(f))
+        except Exception as e:
+            print(f"[WARN] ignoring unreadable FFTW wisdom {wisdom_path}: {e}")
+
+
+def save_fftw_wisdom(wisdom_path: Path) -> None:
+    # 先写临时文件再 rename，避免中断时留下半个文件
+    tmp = wisdom_path.with_suffix(".tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump(pyfftw.export_wisdom(), f)
+    os.replace(tmp, wisdom_path)
+
+
+def fftw_rfft(x: np.ndarray, n: int) -> np.ndarray:
+    """用缓存的 FFTW 计划做逐行 rfft（补零到 n 点），返回计划自带的输出缓冲区（下次调用会被覆盖）"""
+    key = (x.shape[0], n)
+    plan = _FFTW_PLANS.get(key)
+    if plan is None:
+        in_buf = pyfftw.empty_aligned(key, dtype="float32")
+        out_buf = pyfftw.empty_aligned((x.shape[0], n // 2 + 1), dtype="complex64")
+        # FFTW_MEASURE 规划时会改写缓冲区，因此先建计划再拷入数据
+        plan = _FFTW_PLANS[key] = pyfftw.FFTW(
+            in_buf, out_buf, axes=(1,), flags=("FFTW_MEASURE", "FFTW_DESTROY_INPUT"), threads=os.cpu_count() or 1
+        )
+    in_buf = plan.input_array
+    in_buf[:, : x.shape[1]] = x
+    in_buf[:, x.shape[1] :] = 0
+    return plan()
+
+
+def rfft_mag(x: np.ndarray, n: int) -> np.ndarray:
+    # 使用 rfft 幅度谱（更稳健），避免相位噪声；每行补零到 n 点后变换，结果为 (N, n // 2 + 1) 数组
+    # x 约定为 float32（embedding 与 W 在读入时即为 float32），rfft 得到 complex64，不做升精度拷贝
+    # 启用时用缓存的 FFTW 计划；scipy.fft 按行分给所有核心（workers=-1）；numpy.fft 只能单线程
+    if _FFTW_ENABLED:
+        f = fftw_rfft(x, n)
+    elif HAS_SCIPY_FFT:
+        f = sfft.rfft(x, n=n, axis=1, workers=-1)
+    else:
+        f = np.fft.rfft(x, n=n, axis=1)
+    out = np.empty(f.shape, dtype=np.float32)
+    np.abs(f, out=out)
+    return out
+
+
+def spec_scores_numpy(mag_m: np.ndarray, mag_t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # mag_m 为未归一化幅度谱（原地归一化），mag_t 已归一化；返回 (spec_mse, spec_cosine)
+    mag_m = l2_normalize_(mag_m)
+    return np.mean((mag_m - mag_t) ** 2, axis=1), np.einsum("ij,ij->i", mag_m, mag_t)
+
+
+if HAS_NUMBA:
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def spec_scores(mag_m: np.ndarray, mag_t: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # 与 spec_scores_numpy 相同，但每行一次融合循环（归一化 + MSE + 余弦），按行多线程，不产生中间数组
+        n, length = mag_m.shape
+        mse = np.empty(n, dtype=np.float32)
+        cos = np.empty(n, dtype=np.float32)
+        for i in prange(n):
+            sq = 0.0
+            for j in range(length):
+                sq += mag_m[i, j] * mag_m[i, j]
+            inv = 1.0 / max(np.sqrt(sq), 1e-12)
+            se = 0.0
+            dot = 0.0
+            for j in range(length):
+                m = mag_m[i, j] * inv
+                d = m - mag_t[i, j]
+                se += d * d
+                dot += m * mag_t[i, j]
+            mse[i] = se / length
+            cos[i] = dot
+        return mse, cos
+
+else:
+    spec_scores = spec_scores_numpy
+
+
+def ollama_embeddings_batch(
+    base_url: str, model: str, texts: List[str], timeout_s: int = 120, session: requests.Session = SESSION
+) -> np.ndarray:
+    """
+    一次请求取回所有文本的 embedding，返回 (N, D) float32 数组。
+    /api/embed 不存在（404，旧版 Ollama）时逐条请求 /api/embeddings。
+    """
+    url = base_url.rstrip("/") + "/api/embed"
+    payload = {"model": model, "input": texts}
+    r = session.post(url, json=payload, timeout=timeout_s)
+    if r.status_code == 404:
+        return np.stack([ollama_embedding_single(base_url, model, t, timeout_s, session) for t in texts])
+    r.raise_for_status()
+    return parse_embed_response(r.json(), model, len(texts))
 
 
-def rfft_mag(x: np.ndarray) -> np.ndarray:
-    # 使用 rfft 幅度谱（更稳健），避免相位噪声
-    f = np.fft.rfft(x.astype(np.float32))
-    return np.abs(f).astype(np.float32)
+def ollama_embedding_single(
+    base_url: str, model: str, text: str, timeout_s: int = 120, session: requests.Session = SESSION
+) -> np.ndarray:
+    r = session.post(base_url.rstrip("/") + "/api/embeddings", json={"model": model, "prompt": text}, timeout=timeout_s)
+    r.raise_for_status()
+    return parse_embedding_response(r.json(), model)
 
 
-def cosine(a: np.ndarray, b: np.ndarray) -> float:
-    a = l2_normalize(a)
-    b = l2_normalize(b)
-    return float(np.dot(a, b))
+def parse_embed_response(data: Dict[str, Any], model: str, n: int) -> np.ndarray:
+    embs = data.get("embeddings")
+    if not embs or len(embs) != n or not all(embs):
+        raise RuntimeError(f"Ollama embed returned empty/mismatched embeddings for model={model}")
+    return np.stack([np.asarray(e, dtype=np.float32) for e in embs])
 
 
-def ollama_embeddings(base_url: str, model: str, text: str, timeout_s: int = 30) -> np.ndarray:
-    url = base_url.rstrip("/") + "/api/embeddings"
-    payload = {"model": model, "prompt": text}
-    r = requests.post(url, json=payload, timeout=timeout_s)
-    r.raise_for_status()
-    data = r.json()
+def parse_embedding_response(data: Dict[str, Any], model: str) -> np.ndarray:
     emb = data.get("embedding")
     if not emb:
         raise RuntimeError(f"Ollama embeddings returned empty embedding for model={model}")
     return np.asarray(emb, dtype=np.float32)
 
 
+async def emb_async(client: "httpx.AsyncClient", base_url: str, model: str, text: str) -> np.ndarray:
+    r = await client.post(base_url.rstrip("/") + "/api/embeddings", json={"model": model, "prompt": text})
+    r.raise_for_status()
+    return parse_embedding_response(r.json(), model)
+
+
+async def embed_batch_async(
+    client: "httpx.AsyncClient", base_url: str, model: str, texts: List[str], sem: asyncio.Semaphore
+) -> np.ndarray:
+    """优先走批量 /api/embed；端点不存在（404，旧版 Ollama）时逐条请求，由 sem 限制并发。"""
+    r = await client.post(base_url.rstrip("/") + "/api/embed", json={"model": model, "input": texts})
+    if r.status_code != 404:
+        r.raise_for_status()
+        return parse_embed_response(r.json(), model, len(texts))
+
+    async def one(text: str) -> np.ndarray:
+        async with sem:
+            return await emb_async(client, base_url, model, text)
+
+    return np.stack(await asyncio.gather(*(one(t) for t in texts)))
+
+
+async def fetch_embeddings_async(base_url: str, jobs: List[Tuple[str, List[str]]]) -> List[np.ndarray]:
+    """各 (model, texts) 任务并发执行，共用一个连接池。"""
+    sem = asyncio.Semaphore(4)
+    async with httpx.AsyncClient(timeout=120, limits=httpx.Limits(max_connections=16)) as client:
+        return await asyncio.gather(*(embed_batch_async(client, base_url, m, ts, sem) for m, ts in jobs))
+
+
+def embedding_cache_key(model: str, text: str) -> str:
+    return hashlib.sha256((model + "\x00" + text).encode("utf-8")).hexdigest()
+
+
+def embed_models_cached(base_url: str, models: List[str], texts: List[str], cache_dir: Path | None) -> List[np.ndarray]:
+    """
+    取回每个模型对 texts 的 embedding，返回与 models 对应的 (N, D) 数组列表：
+    - 每条文本按 sha256(model + "\0" + text) 缓存为 cache_dir/<hash>.npy，cache_dir=None 时不读写缓存
+    - 只请求未命中的文本；有 httpx 时各模型的请求并发发出，否则顺序批量请求
+    """
+    pending = []
+    jobs: List[Tuple[str, List[str]]] = []
+    for model in models:
+        if cache_dir is not None:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+            paths = [cache_dir / f"{embedding_cache_key(model, t)}.npy" for t in texts]
+        else:
+            paths = [None] * len(texts)
+        embs: List[np.ndarray | None] = [np.load(p) if p is not None and p.exists() else None for p in paths]
+        missing = [i for i, e in enumerate(embs) if e is None]
+        pending.append((model, paths, embs, missing))
+        if missing:
+            jobs.append((model, [texts[i] for i in missing]))
+
+    if not jobs:
+        fetched = []
+    elif HAS_HTTPX:
+        fetched = asyncio.run(fetch_embeddings_async(base_url, jobs))
+    else:
+        fetched = [ollama_embeddings_batch(base_url, m, ts) for m, ts in jobs]
+
+    fetched_iter = iter(fetched)
+    for model, paths, embs, missing in pending:
+        if missing:
+            for i, e in zip(missing, next(fetched_iter)):
+                if paths[i] is not None:
+                    # 先写临时文件再 rename，避免中断时留下半个 .npy
+                    tmp = paths[i].with_suffix(".npy.tmp")
+                    with open(tmp, "wb") as f:
+                        np.save(f, e)
+                    os.replace(tmp, paths[i])
+                embs[i] = e
+        if cache_dir is not None:
+            print(f"[INFO] {model}: cache hit {len(texts) - len(missing)}/{len(texts)}")
+
+    return [np.stack(embs) for _, _, embs, _ in pending]
+
+
 def load_alignment_matrix(w_path: Path) -> np.ndarray:
     """
     W_v2_1.npy 预期形状：
     - (teacher_dim, draft_dim) 或 (draft_dim, teacher_dim)
-    我们自动判断并在映射时处理转置。
+    方向由 orient_w 按形状一次性确定。
+
+    以只读 mmap 方式打开：已是 float32 时不复制，矩阵乘法只按需读入用到的页；
+    其他 dtype 才转换成连续的 float32 副本。
     """
-    w = np.load(str(w_path)).astype(np.float32)
+    w = np.load(str(w_path), mmap_mode="r")
     if w.ndim != 2:
         raise ValueError(f"W must be 2D, got shape={w.shape}")
+    if w.dtype != np.float32:
+        w = np.ascontiguousarray(w, dtype=np.float32)
     return w
 
 
-def map_draft_to_teacher(W: np.ndarray, draft: np.ndarray, teacher_dim_hint: int | None = None) -> np.ndarray:
+def orient_w(W: np.ndarray, draft_dim: int, teacher_dim: int) -> np.ndarray:
     """
-    尝试两种方向：
-    - teacher = W @ draft
-    - teacher = W.T @ draft
-    以输出维度更接近 teacher_dim_hint 的为准；没有 hint 时优先 W @ draft 可行者。
+    按形状一次性确定 W 的方向，返回 (teacher_dim, draft_dim) 的视图 W_eff，使 teacher = W_eff @ draft：
+    - W 形状为 (teacher_dim, draft_dim) 时直接使用
+    - W 形状为 (draft_dim, teacher_dim) 时使用 W.T（方阵时优先不转置）
     """
-    candidates: List[Tuple[str, np.ndarray]] = []
-    try:
-        cand = W @ draft
-        candidates.append(("W@draft", cand))
-    except Exception:
-        pass
-    try:
-        cand = W.T @ draft
-        candidates.append(("W.T@draft", cand))
-    except Exception:
-        pass
+    if W.shape == (teacher_dim, draft_dim):
+        return W
+    if W.shape == (draft_dim, teacher_dim):
+        return W.T
+    raise ValueError(f"W={W.shape} does not map draft dim {draft_dim} to teacher dim {teacher_dim}")
+
+
+def teacher_pack(teacher_embs: np.ndarray, n_fft: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    teacher 侧只取决于 (model, texts)，与 W 无关：
+    归一化 embedding 与归一化幅度谱各算一次，扫描多个 W 时直接复用。
+    """
+    te = l2_normalize_(teacher_embs)
+    mag_t = l2_normalize_(rfft_mag(te, n_fft))
+    return te, mag_t
+
 
-    if not candidates:
-        raise RuntimeError(f"Cannot apply W to draft: W={W.shape}, draft={draft.shape}")
+def spectral_metrics(
+    W_eff: np.ndarray, draft_embs: np.ndarray, te: np.ndarray, mag_t: np.ndarray, n_fft: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """整批计算：draft 按行映射到 teacher 空间（W_eff 见 orient_w），再逐行做频域度量。返回 (cosine, spec_mse, spec_cosine)。"""
+    mapped = l2_normalize_(draft_embs @ W_eff.T)
 
-    if teacher_dim_hint is None:
-        return candidates[0][1]
+    # einsum 逐行点积，不生成 (N, D) 的乘积临时数组
+    cos = np.einsum("ij,ij->i", mapped, te)
 
-    # 选择输出维度最接近 teacher_dim_hint 的
-    candidates.sort(key=lambda kv: abs(kv[1].shape[0] - teacher_dim_hint))
-    return candidates[0][1]
+    spec_mse, spec_cos = spec_scores(rfft_mag(mapped, n_fft), mag_t)
+    return cos, spec_mse, spec_cos
 
 
 def ensure_deps_for_plot() -> Tuple[bool, Any]:
@@ -137,86 +381,10 @@ def ensure_deps_for_plot() -> Tuple[bool, Any]:
         return False, None
 
 
-def percentile(xs: List[float], p: float) -> float:
-    if not xs:
-        return 0.0
-    xs_sorted = sorted(xs)
-    k = (len(xs_sorted) - 1) * p
-    f = math.floor(k)
-    c = math.ceil(k)
-    if f == c:
-        return float(xs_sorted[int(k)])
-    d0 = xs_sorted[f] * (c - k)
-    d1 = xs_sorted[c] * (k - f)
-    return float(d0 + d1)
-
-
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--ollama", default="http://localhost:11434", help="Ollama base url")
-    ap.add_argument("--draft-model", default="qwen2.5:0.5b", help="Ollama model for draft embeddings")
-    ap.add_argument("--teacher-model", default="qwen2.5:7b", help="Ollama model for teacher embeddings")
-    ap.add_argument("--w", default="benchmark/qwen-sentence-align/artifacts/W_v2_1.npy", help="Alignment matrix path")
-    ap.add_argument("--out-dir", default="benchmark/qwen-sentence-align/reports/spectral", help="Output directory")
-    ap.add_argument("--n", type=int, default=len(DEFAULT_TEXTS), help="How many texts to test")
-    args = ap.parse_args()
-
-    w_path = Path(args.w)
-    out_dir = Path(args.out_dir)
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    # 0) health check ollama
-    try:
-        r = requests.get(args.ollama.rstrip("/") + "/api/tags", timeout=5)
-        if r.status_code != 200:
-            raise RuntimeError(f"unexpected status: {r.status_code}")
-    except Exception as e:
-        print("[ERROR] Ollama is not reachable. Please start Ollama first.")
-        print("        Expected endpoint: http://localhost:11434/api/tags")
-        print(f"        Details: {e}")
-        print("\nIf you don't use Ollama, you can still keep this script as a planned experiment entry.")
-        raise SystemExit(2)
-
-    if not w_path.exists():
-        print(f"[ERROR] Missing alignment matrix: {w_path}")
-        raise SystemExit(2)
-
-    W = load_alignment_matrix(w_path)
-
-    texts = DEFAULT_TEXTS[: max(1, min(args.n, len(DEFAULT_TEXTS)))]
-    results: List[SampleResult] = []
-
-    print(f"[INFO] texts={len(texts)}")
-    print(f"[INFO] draft-model={args.draft_model}, teacher-model={args.teacher_model}")
-    print(f"[INFO] W shape={W.shape}")
-
-    for i, t in enumerate(texts, 1):
-        print(f"[{i}/{len(texts)}] embedding...")
-        d = ollama_embeddings(args.ollama, args.draft_model, t)
-        te = ollama_embeddings(args.ollama, args.teacher_model, t)
-
-        mapped = map_draft_to_teacher(W, d, teacher_dim_hint=te.shape[0])
-        mapped = l2_normalize(mapped)
-        te = l2_normalize(te)
-
-        cos = cosine(mapped, te)
-
-        mag_m = rfft_mag(mapped)
-        mag_t = rfft_mag(te)
-        # pad to same length (rfft length differs by dim)
-        L = max(mag_m.shape[0], mag_t.shape[0])
-        if mag_m.shape[0] != L:
-            mag_m = np.pad(mag_m, (0, L - mag_m.shape[0]))
-        if mag_t.shape[0] != L:
-            mag_t = np.pad(mag_t, (0, L - mag_t.shape[0]))
-
-        mag_m = l2_normalize(mag_m)
-        mag_t = l2_normalize(mag_t)
-        spec_mse = float(np.mean((mag_m - mag_t) ** 2))
-        spec_cos = float(np.dot(mag_m, mag_t))
-
-        results.append(SampleResult(text=t, cosine=cos, spec_mse=spec_mse, spec_cosine=spec_cos))
-
+def write_artifacts(
+    args: argparse.Namespace, w_path: Path, W: np.ndarray, n_fft: int, results: List[SampleResult], out_dir: Path
+):
+    """写出单个 W 的 CSV、Markdown 报告和分布图"""
     # write csv
     csv_path = out_dir / "spectral_alignment_baseline.csv"
     with open(csv_path, "w", encoding="utf-8") as f:
@@ -241,15 +409,16 @@ def main():
         f.write(f"- Draft model: `{args.draft_model}`\n")
         f.write(f"- Teacher model: `{args.teacher_model}`\n")
         f.write(f"- W: `{w_path.as_posix()}` (shape={tuple(W.shape)})\n")
+        f.write(f"- RFFT length: {n_fft}\n")
         f.write(f"- Samples: {len(results)}\n\n")
         f.write("## Metrics\n\n")
         f.write("- `cosine`: cosine(mapped, teacher)\n")
         f.write("- `spec_mse`: MSE(|RFFT(mapped)|, |RFFT(teacher)|) on L2-normalized magnitude spectrum\n")
         f.write("- `spec_cosine`: cosine similarity between normalized magnitude spectra\n\n")
         f.write("## Summary\n\n")
-        f.write(f"- cosine: mean={float(np.mean(cosines)):.6f}, p50={percentile(cosines, 0.50):.6f}, p95={percentile(cosines, 0.95):.6f}\n")
-        f.write(f"- spec_mse: mean={float(np.mean(spec_mses)):.8f}, p50={percentile(spec_mses, 0.50):.8f}, p95={percentile(spec_mses, 0.95):.8f}\n")
-        f.write(f"- spec_cosine: mean={float(np.mean(spec_coses)):.6f}, p50={percentile(spec_coses, 0.50):.6f}, p95={percentile(spec_coses, 0.95):.6f}\n")
+        for name, xs, fmt in (("cosine", cosines, ".6f"), ("spec_mse", spec_mses, ".8f"), ("spec_cosine", spec_coses, ".6f")):
+            p50, p95 = np.percentile(xs, [50, 95])
+            f.write(f"- {name}: mean={float(np.mean(xs)):{fmt}}, p50={p50:{fmt}}, p95={p95:{fmt}}\n")
         f.write("\n## Artifacts\n\n")
         f.write(f"- CSV: `{csv_path.as_posix()}`\n")
         f.write(f"- Report: `{report_path.as_posix()}`\n")
@@ -280,6 +449,78 @@ def main():
     print(f"[OK] report: {report_path}")
 
 
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--ollama", default="http://localhost:11434", help="Ollama base url")
+    ap.add_argument("--draft-model", default="qwen2.5:0.5b", help="Ollama model for draft embeddings")
+    ap.add_argument("--teacher-model", default="qwen2.5:7b", help="Ollama model for teacher embeddings")
+    ap.add_argument("--w", default="benchmark/qwen-sentence-align/artifacts/W_v2_1.npy", help="Alignment matrix path")
+    ap.add_argument("--out-dir", default="benchmark/qwen-sentence-align/reports/spectral", help="Output directory")
+    ap.add_argument("--n", type=int, default=len(DEFAULT_TEXTS), help="How many texts to test")
+    ap.add_argument("--w-glob", default=None, help="Sweep all alignment matrices matching this glob (outputs go to <out-dir>/<W stem>/)")
+    ap.add_argument("--fft-pow2", action="store_true", help="Zero-pad spectra to the next power of two of the teacher dim")
+    ap.add_argument("--no-cache", action="store_true", help="Bypass the embedding cache under <out-dir>/.emb_cache")
+    args = ap.parse_args()
+
+    w_path = Path(args.w)
+    out_dir = Path(args.out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    # 0) health check ollama
+    try:
+        r = SESSION.get(args.ollama.rstrip("/") + "/api/tags", timeout=5)
+        if r.status_code != 200:
+            raise RuntimeError(f"unexpected status: {r.status_code}")
+    except Exception as e:
+        print("[ERROR] Ollama is not reachable. Please start Ollama first.")
+        print("        Expected endpoint: http://localhost:11434/api/tags")
+        print(f"        Details: {e}")
+        print("\nIf you don't use Ollama, you can still keep this script as a planned experiment entry.")
+        raise SystemExit(2)
+
+    w_paths = [Path(p) for p in sorted(glob.glob(args.w_glob))] if args.w_glob else [w_path]
+    if not w_paths:
+        print(f"[ERROR] No alignment matrix matches: {args.w_glob}")
+        raise SystemExit(2)
+    for p in w_paths:
+        if not p.exists():
+            print(f"[ERROR] Missing alignment matrix: {p}")
+            raise SystemExit(2)
+
+    texts = DEFAULT_TEXTS[: max(1, min(args.n, len(DEFAULT_TEXTS)))]
+
+    print(f"[INFO] texts={len(texts)}")
+    print(f"[INFO] draft-model={args.draft_model}, teacher-model={args.teacher_model}")
+
+    print("[INFO] embedding (batched)...")
+    cache_dir = None if args.no_cache else out_dir / ".emb_cache"
+    draft_embs, teacher_embs = embed_models_cached(args.ollama, [args.draft_model, args.teacher_model], texts, cache_dir)
+    n_fft = fft_length(teacher_embs.shape[1], args.fft_pow2)
+    # 单个 W 只做两次 rfft，scipy 更快；扫描多个 W 时同一个 FFTW 计划被反复使用
+    fftw_wisdom = out_dir / ".fftw_wisdom"
+    use_fftw = HAS_PYFFTW and len(w_paths) > 1
+    if use_fftw:
+        enable_fftw(fftw_wisdom)
+    te, mag_t = teacher_pack(teacher_embs, n_fft)
+
+    for p in w_paths:
+        W = load_alignment_matrix(p)
+        print(f"[INFO] W={p.as_posix()} shape={W.shape}")
+        W_eff = orient_w(W, draft_embs.shape[1], te.shape[1])
+        cos, spec_mse, spec_cos = spectral_metrics(W_eff, draft_embs, te, mag_t, n_fft)
+        results = [
+            SampleResult(text=t, cosine=float(c), spec_mse=float(m), spec_cosine=float(sc))
+            for t, c, m, sc in zip(texts, cos, spec_mse, spec_cos)
+        ]
+        # 扫描模式下每个 W 的产物放到 <out-dir>/<W 文件名>/
+        w_out_dir = out_dir / p.stem if args.w_glob else out_dir
+        w_out_dir.mkdir(parents=True, exist_ok=True)
+        write_artifacts(args, p, W, n_fft, results, w_out_dir)
+
+    if use_fftw:
+        save_fftw_wisdom(fftw_wisdom)
+
+
 if __name__ == "__main__":
     main()
 